@@ -19,6 +19,7 @@
 from designformat import DFConstants
 
 from .base import DFBase
+from .common import DFNodeDict, DFNodeList
 
 class DFAddressMapInitiator(DFBase):
     """
@@ -26,6 +27,8 @@ class DFAddressMapInitiator(DFBase):
     any transformation (masking and offset) that is applied to the inbound request.
     """
 
+    OWNERS = ('map',)
+
     def __init__(self, port=None, port_index=0, mask=None, offset=None, map=None):
         """ Construct the address map initiator.
 
@@ -137,6 +140,10 @@ class DFAddressMapTarget(DFBase):
     transaction.
     """
 
+    __slots__ = ('port', 'port_index', 'offset', 'aperture', 'map')
+
+    OWNERS = ('map',)
+
     def __init__(self, port=None, port_index=0, offset=None, aperture=None, map=None):
         """ Construct the address map target
 
@@ -216,6 +223,8 @@ class DFAddressMapConstraint(DFBase):
     viable targets for a specific initiator.
     """
 
+    OWNERS = ('initiator',)
+
     def __init__(self, initiator=None, target=None):
         """ Constructor for an address map constraint
 
@@ -287,6 +296,8 @@ class DFAddressMap(DFBase):
     the address as it passes through the block (masking and offset).
     """
 
+    OWNERS = ('block',)
+
     def __init__(self, block=None):
         """ Constructor for an address map
 
@@ -295,43 +306,51 @@ class DFAddressMap(DFBase):
         """
         super(DFAddressMap, self).__init__(None, None)
         self.block       = block
-        self.initiators  = []
-        self.targets     = []
-        self.constraints = {}
+        self.initiators  = DFNodeList(owner=self)
+        self.targets     = DFNodeList(owner=self)
+        self.constraints = DFNodeDict(owner=self)
 
-    def addInitiator(self, initiator):
+    def addInitiator(self, initiator, check=True):
         """ Add an initiator to this address map
 
         Args:
             initiator: The initiator
+            check    : Whether to check that the initiator's port is not already
+                       in the map, otherwise this is left to validate
         """
         if not isinstance(initiator, DFAddressMapInitiator):
             raise Exception("Initiator is of invalid type " + type(initiator).__name__)
-        elif initiator in self.initiators:
-            raise Exception("Initiator has already been added to map")
-        elif initiator.port in [x.port for x in self.initiators if x.port_index == initiator.port_index]:
-            raise Exception("An initiator has already been added for port " + initiator.id)
-        elif initiator.port in [x.port for x in self.targets if x.port_index == initiator.port_index]:
-            raise Exception("Port " + initiator.id + " cannot be added as initiator as it is already a target")
+        if check:
+            if initiator in self.initiators:
+                raise Exception("Initiator has already been added to map")
+            elif initiator.port in [x.port for x in self.initiators if x.port_index == initiator.port_index]:
+                raise Exception("An initiator has already been added for port " + initiator.id)
+            elif initiator.port in [x.port for x in self.targets if x.port_index == initiator.port_index]:
+                raise Exception("Port " + initiator.id + " cannot be added as initiator as it is already a target")
         self.initiators.append(initiator)
         initiator.map = self
+        self.markDirty()
 
-    def addTarget(self, target):
+    def addTarget(self, target, check=True):
         """ Add a target to this address map
 
         Args:
             target: The target
+            check : Whether to check that the target's port is not already in
+                    the map, otherwise this is left to validate
         """
         if not isinstance(target, DFAddressMapTarget):
             raise Exception("Target is of invalid type " + type(target).__name__)
-        elif target in self.targets:
-            raise Exception("Target has already been added to map")
-        elif target.port in [x.port for x in self.targets if x.port_index == target.port_index]:
-            raise Exception("A target has already been added for port " + target.id)
-        elif target.port in [x.port for x in self.initiators if x.port_index == target.port_index]:
-            raise Exception("Port " + target.id + " cannot be added as target as it is already a initiator")
+        if check:
+            if target in self.targets:
+                raise Exception("Target has already been added to map")
+            elif target.port in [x.port for x in self.targets if x.port_index == target.port_index]:
+                raise Exception("A target has already been added for port " + target.id)
+            elif target.port in [x.port for x in self.initiators if x.port_index == target.port_index]:
+                raise Exception("Port " + target.id + " cannot be added as target as it is already a initiator")
         self.targets.append(target)
         target.map = self
+        self.markDirty()
 
     def addConstraint(self, initiator, target):
         """ Add a constraint to limit which targets can be accessed from an initiator
@@ -359,6 +378,7 @@ class DFAddressMap(DFBase):
         # Create and add the constraint
         # NOTE: We use a unique key for the initiator-target pairing
         self.constraints[initiator.id+"-"+target.id] = DFAddressMapConstraint(initiator, target)
+        self.markDirty()
 
     def getInitiator(self, port, index):
         """ Get the DFAddressMapInitiator associated to a specific port and index
@@ -492,25 +512,50 @@ class DFAddressMap(DFBase):
 
         return obj
 
-    def loadObject(self, obj, root):
+    def validate(self):
+        """
+        Check that no port appears more than once as an initiator or target,
+        raising the same exceptions as addInitiator and addTarget
+        """
+        initiators = set()
+        for initiator in self.initiators:
+            key = (id(initiator.port), initiator.port_index)
+            if key in initiators:
+                raise Exception("An initiator has already been added for port " + initiator.id)
+            initiators.add(key)
+        targets = set()
+        for target in self.targets:
+            key = (id(target.port), target.port_index)
+            if key in targets:
+                raise Exception("A target has already been added for port " + target.id)
+            elif key in initiators:
+                raise Exception("Port " + target.id + " cannot be added as target as it is already a initiator")
+            targets.add(key)
+        return self
+
+    def loadObject(self, obj, root, trusted=False):
         """ Reload the address map from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
-            types: Map from class name to class definition
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate), the
+                     initiators and targets are added without checking for
+                     duplicates
         """
         super(DFAddressMap, self).loadObject(obj, root)
 
         # Load all initiators
         if 'initiators' in obj:
             for item in obj['initiators']:
-                self.addInitiator(DFAddressMapInitiator().loadObject(item, root))
+                initiator = DFAddressMapInitiator().loadObject(item, root)
+                self.addInitiator(initiator, check=not trusted)
 
         # Load all targets
         if 'targets' in obj:
             for item in obj['targets']:
-                self.addTarget(DFAddressMapTarget().loadObject(item, root))
+                target = DFAddressMapTarget().loadObject(item, root)
+                self.addTarget(target, check=not trusted)
 
         # Load all constraints
         if 'constraints' in obj:
@@ -17,13 +17,29 @@
 #
 
 import inspect
+from types import MemberDescriptorType
 
-from .common import DFShortcutList, encapsulatedLoad, encapsulatedDump
-from .common import CLASS_FROM_DICT
+from .common import DFNodeDict, DFNodeList, DFShortcutList, encapsulatedLoad
+from .common import encapsulatedDump, CLASS_FROM_DICT, hashDump, slotNames
 
 class DFBase(object):
     """ Base class of DesignFormat """
 
+    # Properties are held in slots, so that the classes with the most instances
+    # (ports, connections, registers and their fields, address map targets) can
+    # store them without a per-instance dictionary by also using __slots__. The
+    # '__dict__' slot still allows other attributes to be added to any node, its
+    # dictionary is only allocated once the first such attribute is set.
+    __slots__ = ('id', 'description', '__attributes', '__tracked', '__dict__')
+
+    # Attributes referring to the nodes that hold this one, through which any
+    # modification is reported up to the owning DFBlock (see markDirty)
+    OWNERS = ()
+
+    # Whether the node is held in DFShortcutLists keyed by its ID or name, which
+    # must be told whenever it is renamed (see heldLists)
+    INDEXED = False
+
     def __init__(self, id, description=None):
         """ Initialisation for DFBase
 
@@ -31,9 +47,109 @@ class DFBase(object):
             id         : Identifier for the object
             description: Human-readable description for the object
         """
-        self.id          = id
-        self.attributes  = {}
-        self.description = description
+        self.__tracked    = False
+        self.id           = id
+        self.description  = description
+        self.__attributes = None
+
+    def __setattr__(self, key, value):
+        """
+        Report any change to a public property of a tracked node (see
+        markDirty). When a node is moved to another holder, both holders are
+        marked. Renaming the node is reported to the lists holding it (see
+        heldLists).
+
+        Args:
+            key  : The attribute being set
+            value: The value to set
+        """
+        if key[0] == '_':
+            object.__setattr__(self, key, value)
+            return
+        renamed = self.INDEXED and (key == 'id' or key == 'name')
+        tracked = self.__isTracked()
+        if not (tracked or renamed):
+            object.__setattr__(self, key, value)
+            return
+        if renamed:
+            # Read the previous value directly, so that an unset slot doesn't
+            # fall through to the __getattr__ overrides of subclasses
+            try:
+                old = object.__getattribute__(self, key)
+            except AttributeError:
+                renamed = False
+        # Marking the node stops it being tracked, so a node moved to another
+        # holder is tracked again to report the move to the new holder as well
+        if tracked:
+            self.markDirty()
+        object.__setattr__(self, key, value)
+        if tracked and key in self.OWNERS:
+            self.__tracked = True
+            self.markDirty()
+        if renamed and old != value:
+            self.__renamed(key, old)
+
+    def __isTracked(self):
+        """ Check whether a value derived from the node is cached (see holdCache) """
+        # The flag is unset on nodes constructed without calling __init__
+        try:
+            return self.__tracked
+        except AttributeError:
+            return False
+
+    def __renamed(self, key, old):
+        """ Update the index of every list holding the node after it is renamed
+
+        Args:
+            key: The attribute that was changed ('id' or 'name')
+            old: The previous value of the attribute
+        """
+        for name in self.OWNERS:
+            try:
+                owner = object.__getattribute__(self, name)
+            except AttributeError:
+                continue
+            if isinstance(owner, DFBase):
+                for entries in owner.heldLists():
+                    entries.rekey(self, key, old)
+
+    def heldLists(self):
+        """
+        Return the DFShortcutLists of other nodes held by this node, which are
+        told when any of their entries is renamed. Nodes holding such lists
+        override this, and are listed as OWNERS of the (INDEXED) nodes they
+        hold.
+
+        Returns:
+            tuple: The lists held by the node
+        """
+        return ()
+
+    def entriesChanged(self):
+        """
+        Called by the DFShortcutLists held by this node when any entries are
+        added, removed or renamed, for nodes which index the entries of their
+        lists (see DFBlock) to discard the index.
+        """
+        pass
+
+    @property
+    def attributes(self):
+        """
+        Dictionary of attributes, which is only allocated when first used and
+        reports any modification to the node (see markDirty)
+        """
+        if self.__attributes == None:
+            self.__attributes = DFNodeDict(owner=self)
+        return self.__attributes
+
+    @attributes.setter
+    def attributes(self, value):
+        self.__attributes = DFNodeDict(value, self) if value != None else None
+
+    def hasAttributes(self):
+        """ Check whether any attributes are set, without allocating the dictionary """
+        return bool(self.__attributes)
 
     def dumpObject(self, project):
         """ Serialise the object into a dictionary
@@ -46,6 +162,10 @@ class DFBase(object):
         """
         obj = {}
 
+        # Anything the dump is cached in (or derived from) must be told when
+        # the node is modified
+        self.holdCache()
+
         # Attach the basic object properties
         obj['id'] = self.id
 
@@ -53,10 +173,10 @@ class DFBase(object):
             obj['description'] = self.description
 
         # Attach attributes
-        if len(self.attributes.keys()) > 0:
+        if self.__attributes:
             obj['attributes'] = {}
-            for attr in self.attributes:
-                obj['attributes'][attr] = encapsulatedDump(self.attributes[attr], project)
+            for attr in self.__attributes:
+                obj['attributes'][attr] = encapsulatedDump(self.__attributes[attr], project)
 
         return obj
 
@@ -82,6 +202,120 @@ class DFBase(object):
 
         return self
 
+    def validate(self):
+        """
+        Check that the node's values are consistent, raising an exception if
+        not. This is run automatically as nodes are loaded, unless a trusted
+        load is performed - in which case it can be run separately on demand.
+        Nodes containing other nodes extend this to validate them as well.
+
+        Returns:
+            DFBase: Returns this instance (for chaining)
+        """
+        return self
+
+    def contentHash(self, cached=True):
+        """
+        Return a stable hash of the node and everything it holds, calculated
+        from its dump - so two nodes, which may come from different blobs, have
+        the same hash only if they dump identically. Nodes which cache their
+        hash override this (see markDirty).
+
+        Args:
+            cached: Whether hashes cached by the nodes may be reused, otherwise
+                    everything is hashed afresh (see DFProject.verifyCache)
+
+        Returns:
+            str: The SHA-256 hash as a hexadecimal string
+        """
+        return hashDump(self.dumpObject(None))
+
+    def holdCache(self):
+        """
+        Note that a value derived from this node has been cached, by the node
+        itself or a node holding it (for example a dump, content hash or
+        register table) - from which point the node is tracked, and its
+        modifications are reported through markDirty. This is called for every
+        node that is dumped. Nodes that nothing has been derived from (such as
+        those of a design that is being loaded) skip the report.
+        """
+        self.__tracked = True
+
+    def discardCache(self):
+        """
+        Discard any values cached by the node itself, this is called by
+        markDirty and is overridden by the nodes that cache values.
+        """
+        pass
+
+    def markDirty(self):
+        """
+        Flag that this node has been modified, discarding its cached values and
+        those of the nodes holding it (see discardCache) - for example the
+        cached dump and hash of the DFBlock that holds it (see
+        DFBlock.dumpObject). This is called whenever a public property of the
+        node is set, and by the lists, attribute dictionaries and namespaces
+        (e.g. a register's access types) held by the node when they are
+        modified - the change is reported through each holder in turn (see
+        OWNERS). Values held as attributes are treated as immutable, so must be
+        replaced (see setAttribute) rather than modified in place.
+
+        Only tracked nodes are reported (see holdCache), as a value is only
+        cached after every node it is derived from was tracked - including each
+        holder between the node and the one caching it. Once reported the node
+        is no longer tracked, until a value derived from it is cached again.
+        """
+        if not self.__isTracked():
+            return
+        self.__tracked = False
+        self.discardCache()
+        for key in self.OWNERS:
+            # Read the holder directly, so that an unset slot doesn't fall
+            # through to the __getattr__ overrides of subclasses
+            try:
+                owner = object.__getattribute__(self, key)
+            except AttributeError:
+                continue
+            if isinstance(owner, DFBase):
+                owner.markDirty()
+
+    def __getstate__(self):
+        """
+        Gather the node's attributes for pickling, from both its slots and its
+        __dict__ (holding any attributes that aren't declared as slots). Nodes
+        are untracked once restored, as the values cached by them are not kept.
+
+        Returns:
+            dict: The attributes of the node
+        """
+        try:
+            state = dict(object.__getattribute__(self, '__dict__'))
+        except AttributeError:
+            state = {}
+        for key in slotNames(type(self)):
+            # Skip slots shadowed by a property of a subclass (DFRegister.width)
+            if not isinstance(getattr(type(self), key, None), MemberDescriptorType):
+                continue
+            try:
+                state[key] = object.__getattribute__(self, key)
+            except AttributeError:
+                pass
+        state.pop('_DFBase__tracked', None)
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore the node's attributes when unpickling, this is defined so that
+        the lookup of __setstate__ doesn't reach the __getattribute__ overrides
+        of subclasses (which rely on attributes that are not yet restored), and
+        the values are set directly to bypass any __setattr__ overrides.
+
+        Args:
+            state: The attributes of the node
+        """
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
     def setAttribute(self, key, value):
         """ Set the value of a particular attribute
 
@@ -91,6 +325,7 @@ class DFBase(object):
                    instance that inherits from DFBase)
         """
         self.attributes[key] = value
+        self.markDirty()
 
     def removeAttribute(self, key):
         """ Remove a particular attribute
@@ -99,6 +334,7 @@ class DFBase(object):
             key: Remove associated value for key
         """
         del self.attributes[key]
+        self.markDirty()
 
     def getAttribute(self, key):
         """ Return the value matching the provided key.
@@ -109,7 +345,8 @@ class DFBase(object):
         Returns:
             any: The item that was associated
         """
-        return self.attributes[key] if key in self.attributes else None
+        attrs = self.__attributes
+        return attrs[key] if attrs and key in attrs else None
 
     def __str__(self):
         """ Create a representation of this block
@@ -135,7 +372,7 @@ class DFBase(object):
         members = [
             x for x in inspect.getmembers(self)
             if not '__' in x[0] and type(x[1]) in [
-                DFShortcutList, CLASS_FROM_DICT,
+                DFShortcutList, DFNodeList, DFNodeDict, CLASS_FROM_DICT,
                 list, dict, map,
                 str, int, float, bool
             ]
@@ -158,7 +395,7 @@ class DFBase(object):
                     else:
                         out.append("    "+"    ".join(entry.__repr__().splitlines(True)))
                 out.append("  ]")
-            elif type(item[1]) in [map, dict, CLASS_FROM_DICT] and len(item[1].keys()) > 0:
+            elif type(item[1]) in [map, dict, DFNodeDict, CLASS_FROM_DICT] and len(item[1].keys()) > 0:
                 out.append("  %s: {" % item[0])
                 for i in range(len(item[1].keys())):
                     key = list(item[1].keys())[i]
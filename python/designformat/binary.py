@@ -0,0 +1,221 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Compact binary encoding of a dumped DFProject. The encoding is lossless with
+# respect to the JSON form produced by dumpObject, but stores every string just
+# once in a string table and replaces hierarchical paths (e.g. the 'path' and
+# 'parent' of a DFBlock, or the 'block' of a DFPort) with an index into a table
+# of nodes - where each node is stored as its parent node and its own ID.
+#
+# Layout (all integers are unsigned LEB128 unless stated):
+#
+#  - MAGIC
+#  - String table: count, then the byte length of each string, then the UTF-8
+#    encoded strings concatenated together
+#  - Node table: count, then for each node the index of its parent node plus
+#    one (zero for a root) and the string index of its ID
+#  - The dumped object, as a tagged value (see TAG_*)
+
+import struct
+
+MAGIC = b"DFBIN\x01"
+
+# Keys which carry hierarchical paths to a DFBlock
+PATH_KEYS = ('path', 'parent', 'block')
+
+# Value tags
+TAG_NULL  = 0
+TAG_FALSE = 1
+TAG_TRUE  = 2
+TAG_INT   = 3 # Zig-zag encoded integer
+TAG_FLOAT = 4 # 8-byte little endian double
+TAG_STR   = 5 # Index into the string table
+TAG_LIST  = 6 # Count followed by each value
+TAG_DICT  = 7 # Count followed by key string index and value for each entry
+TAG_PATH  = 8 # Index into the node table
+
+FLOAT = struct.Struct("<d")
+
+def isBinary(data):
+    """ Check whether a buffer starts with the binary encoding's magic marker
+
+    Args:
+        data: The bytes to check
+    """
+    return data[:len(MAGIC)] == MAGIC
+
+def encodeBinary(obj):
+    """ Encode a dumped DFProject (or any JSON compatible value) into bytes
+
+    Args:
+        obj: The value to encode, as produced by DFProject.dumpObject
+
+    Returns:
+        bytes: The encoded form
+    """
+    strings = {}
+    nodes   = {}
+    body    = bytearray()
+
+    def put_uint(value, out):
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def get_string(value):
+        index = strings.get(value)
+        if index == None:
+            index = strings[value] = len(strings)
+        return index
+
+    def get_node(path):
+        index = nodes.get(path)
+        if index == None:
+            split  = path.rfind('.')
+            parent = (get_node(path[:split]) + 1) if split >= 0 else 0
+            index  = nodes[path] = (len(nodes), parent, get_string(path[split+1:]))
+        return index[0]
+
+    def put_value(value, is_path=False):
+        if value is None:
+            body.append(TAG_NULL)
+        elif value is True:
+            body.append(TAG_TRUE)
+        elif value is False:
+            body.append(TAG_FALSE)
+        elif isinstance(value, int):
+            body.append(TAG_INT)
+            put_uint((value << 1) if value >= 0 else ((-value << 1) - 1), body)
+        elif isinstance(value, float):
+            body.append(TAG_FLOAT)
+            body.extend(FLOAT.pack(value))
+        elif isinstance(value, str):
+            if is_path:
+                body.append(TAG_PATH)
+                put_uint(get_node(value), body)
+            else:
+                body.append(TAG_STR)
+                put_uint(get_string(value), body)
+        elif isinstance(value, (list, tuple)):
+            body.append(TAG_LIST)
+            put_uint(len(value), body)
+            for item in value:
+                put_value(item)
+        elif isinstance(value, dict):
+            body.append(TAG_DICT)
+            put_uint(len(value), body)
+            for key, item in value.items():
+                put_uint(get_string(key), body)
+                put_value(item, key in PATH_KEYS)
+        else:
+            raise Exception("Cannot encode value of type " + type(value).__name__)
+
+    put_value(obj)
+
+    # Assemble the tables and the body
+    out     = bytearray(MAGIC)
+    encoded = [x.encode('utf-8') for x in strings.keys()]
+    put_uint(len(encoded), out)
+    for item in encoded:
+        put_uint(len(item), out)
+    for item in encoded:
+        out.extend(item)
+    put_uint(len(nodes), out)
+    for _, parent, id in nodes.values():
+        put_uint(parent, out)
+        put_uint(id, out)
+    out.extend(body)
+    return bytes(out)
+
+def decodeBinary(data):
+    """ Decode bytes produced by encodeBinary back into the dumped form
+
+    Args:
+        data: The encoded bytes
+
+    Returns:
+        any: The decoded value, identical to that which was encoded
+    """
+    if not isBinary(data):
+        raise Exception("Data is not a binary encoded DesignFormat dump")
+    pos = len(MAGIC)
+
+    def get_uint():
+        nonlocal pos
+        byte   = data[pos]
+        pos   += 1
+        if byte < 0x80:
+            return byte
+        value  = byte & 0x7F
+        shift  = 7
+        while True:
+            byte   = data[pos]
+            pos   += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    # Read the string table
+    lengths = [get_uint() for _ in range(get_uint())]
+    strings = []
+    for length in lengths:
+        strings.append(data[pos:pos+length].decode('utf-8'))
+        pos += length
+
+    # Read the node table, rebuilding the path of each node
+    paths = []
+    for _ in range(get_uint()):
+        parent = get_uint()
+        id     = strings[get_uint()]
+        paths.append(id if parent == 0 else (paths[parent - 1] + '.' + id))
+
+    def get_value():
+        nonlocal pos
+        tag  = data[pos]
+        pos += 1
+        if tag == TAG_STR:
+            return strings[get_uint()]
+        elif tag == TAG_DICT:
+            value = {}
+            for _ in range(get_uint()):
+                key        = strings[get_uint()]
+                value[key] = get_value()
+            return value
+        elif tag == TAG_PATH:
+            return paths[get_uint()]
+        elif tag == TAG_INT:
+            value = get_uint()
+            return (value >> 1) if not (value & 1) else -((value + 1) >> 1)
+        elif tag == TAG_LIST:
+            return [get_value() for _ in range(get_uint())]
+        elif tag == TAG_NULL:
+            return None
+        elif tag == TAG_TRUE:
+            return True
+        elif tag == TAG_FALSE:
+            return False
+        elif tag == TAG_FLOAT:
+            value = FLOAT.unpack_from(data, pos)[0]
+            pos  += FLOAT.size
+            return value
+        else:
+            raise Exception("Unknown tag %i in binary encoded dump" % tag)
+
+    return get_value()
@@ -16,22 +16,62 @@
 # DesignFormat. If not, see <https://www.gnu.org/licenses/>.
 #
 
+import json
 import re
 
 from designformat import DFConstants
 
 from .address_map import DFAddressMap
 from .base import DFBase
-from .common import DFShortcutList, convert_to_class
+from .common import DFNodeList, DFShortcutList, convert_to_class, hashDump
+from .common import internString
+from .common import matchInclude
 from .connection import DFConnection
+from .connection_table import DFConnectionTable
 from .constant_tie import DFConstantTie
 from .interconnect import DFInterconnect
+from .parallel import dumpShared, openPool
 from .port import DFPort
 from .register_group import DFRegisterGroup
+from .register_table import DFRegisterTable
 
 class DFBlock(DFBase):
     """ DesignFormat representation of a system block """
 
+    # Serialised keys holding the contents of the block, which are constructed
+    # after the block's own properties and ports
+    CONTENTS = ('registers', 'children', 'connections', 'address_map')
+
+    # The parent is told when the block is renamed (see DFBase.heldLists)
+    OWNERS  = ('parent',)
+    INDEXED = True
+
+    # Cached dump of the block's full contents, with the project it was dumped
+    # for - discarded whenever the block or anything it holds is modified (see
+    # discardCache), or the block or one above it is renamed or moved (see
+    # __discardPaths)
+    __dump = None
+
+    # Cached content hash, discarded alongside the cached dump
+    __hash = None
+
+    # Cached register table, discarded alongside the cached dump
+    __registers = None
+
+    # Cached hierarchical path and project holding the design, discarded when
+    # the block or one above it is renamed or moved
+    __path    = None
+    __project = None
+
+    # Index of the children, register groups and registers that can be accessed
+    # as attributes of the block (see __getattr__), discarded whenever any of
+    # them are added, removed or renamed (see entriesChanged)
+    __names = None
+
+    # Defaulted here as well as in __init__, so that __getattr__ can always
+    # read it (e.g. while unpickling, before the block's state is restored)
+    __lazy = None
+
     def __init__(self, id=None, type=None, parent=None, description=None, address_map=None):
         """ Construct the block instance
 
@@ -45,24 +85,171 @@ class DFBlock(DFBase):
         """
         super(DFBlock, self).__init__(id, description)
 
-        self.type     = type
+        self.type     = internString(type)
         self.parent   = parent
 
         self.ports       = convert_to_class({
-            'input' : DFShortcutList("name"), # Use shortcut list so that ports
-            'output': DFShortcutList("name"), # can be accessed like:
-            'inout' : DFShortcutList("name")  # block.ports.input.clk
-        })
-        self.children    = DFShortcutList("id")
-        self.connections = []
-        self.registers   = DFShortcutList("id")
+            'input' : DFShortcutList("name", self), # Use shortcut list so that
+            'output': DFShortcutList("name", self), # ports can be accessed like:
+            'inout' : DFShortcutList("name", self)  # block.ports.input.clk
+        }, self)
+        self.children    = DFShortcutList("id", self)
+        self.connections = DFNodeList(owner=self)
+        self.registers   = DFShortcutList("id", self)
         self.address_map = address_map
 
+        # Index of hierarchical path to DFBlock/DFPort, only populated on the
+        # root block while the tree is being reloaded (see loadObject)
+        self.__path_index = None
+
+        # Serialised contents and root of a lazily loaded block (see materialise)
+        self.__lazy = None
+
+    def __setattr__(self, key, value):
+        """
+        Intercept changes to the ID or parent of the block, as these invalidate
+        the cached hierarchical paths of this block and every block below it,
+        and replacing the children or register groups discards the index of
+        names. Changes to every public property are reported by DFBase.
+
+        Args:
+            key  : The attribute being set
+            value: The value to set
+        """
+        super(DFBlock, self).__setattr__(key, value)
+        if key == 'id' or key == 'parent':
+            self.__discardPaths()
+        elif key == 'children' or key == 'registers':
+            self.entriesChanged()
+
+    def __discardPaths(self):
+        """
+        Discard the cached path and project of this block and of every block
+        below it, after the block is renamed or moved - along with their cached
+        dumps and hashes, which include the paths. The blocks above are told by
+        markDirty. A block without a cached path or project has no blocks below
+        it with one (as both are found through the block above), so the walk
+        stops there - meaning a block that has just been constructed is skipped.
+        """
+        pending = [self]
+        while len(pending) > 0:
+            block = pending.pop()
+            if block.__path is None and block.__project is None:
+                continue
+            block.__path    = None
+            block.__project = None
+            block.__dump    = None
+            block.__hash    = None
+            # The children of a lazily loaded block are yet to be constructed
+            if block.__lazy is None:
+                pending.extend(block.children)
+
+    def __getstate__(self):
+        """
+        Leave the cached dump, hash and register table out of pickled snapshots
+        of the block
+        """
+        state = super(DFBlock, self).__getstate__()
+        state.pop('_DFBlock__dump', None)
+        state.pop('_DFBlock__hash', None)
+        state.pop('_DFBlock__registers', None)
+        return state
+
+    def discardCache(self):
+        """
+        Discard the cached dump, hash and register table of this block, those of
+        the blocks above it are discarded as the change is reported to each in
+        turn (see DFBase.markDirty).
+        """
+        self.__dump      = None
+        self.__hash      = None
+        self.__registers = None
+
+    def contentHash(self, cached=True):
+        """
+        Return a stable hash of the block and everything below it. This is a
+        Merkle hash, combining the hash of the block's own properties and ports
+        with the hashes of its children, connections, register groups and
+        address map. Hashes are cached in the same way as dumps (see dumpObject)
+        so after a modification only the blocks containing it are rehashed, and
+        two designs can be compared top-down by descending only into children
+        whose hashes differ.
+
+        Args:
+            cached: Whether cached hashes may be reused, otherwise the block and
+                    everything below it are hashed afresh (see verifyCache)
+        """
+        if cached and self.__hash != None:
+            return self.__hash
+        digest = hashDump([
+            hashDump(self.dumpObject(None, contents=False)),
+            [x.contentHash(cached) for x in self.children],
+            hashDump([x.dumpObject(None) for x in self.connections]),
+            [x.contentHash(cached) for x in self.registers],
+            hashDump(self.address_map.dumpObject(None) if self.address_map else None),
+        ])
+        # Track the block again in case lazily loaded contents were constructed
+        # while hashing it (see dumpObject)
+        self.holdCache()
+        self.__hash = digest
+        return digest
+
+    def verifyCache(self, project):
+        """
+        Check that the cached dump and hash of this block, and of each block
+        below it, match those calculated afresh - raising an exception naming
+        the first block that doesn't. Every modification should be reported
+        through markDirty (see DFBase), so a mismatch means one was missed.
+
+        Args:
+            project: Project definition the cached dumps were taken for
+        """
+        blocks  = []
+        pending = [self]
+        while len(pending) > 0:
+            block = pending.pop()
+            blocks.append((
+                block,
+                block.__dump[1] if block.__isDumped(project) else None,
+                block.__hash
+            ))
+            pending.extend(block.children)
+        # Recalculate everything, which replaces the cached values
+        self.dumpObject(project, cached=False)
+        self.contentHash(cached=False)
+        for block, dump, digest in blocks:
+            if dump != None and dump != block.__dump[1]:
+                raise Exception("Cached dump of " + block.hierarchicalPath() + " is stale")
+            if digest != None and digest != block.__hash:
+                raise Exception("Cached hash of " + block.hierarchicalPath() + " is stale")
+        return self
+
+    def registerTable(self):
+        """
+        Return a DFRegisterTable exporting the register groups, registers and
+        fields of this block and every block below it, for bulk queries that
+        would otherwise walk the objects. Each table is a snapshot, which is
+        returned again until the block or anything below it is modified
+        (including the properties of a register or field, see DFBase.markDirty)
+        and a new table is exported - so a table must not itself be modified,
+        and one that was returned earlier is not updated by later modifications.
+        """
+        if self.__registers == None:
+            self.__registers = DFRegisterTable([self])
+        return self.__registers
+
     def hierarchicalPath(self):
-        """ Returns the full hierarchical path to this block from the root """
+        """
+        Returns the full hierarchical path to this block from the root, which
+        is cached until the block or one above it is renamed or moved.
+        """
+        path = self.__path
+        if path is not None:
+            return path
         path = self.id
         if self.parent != None and isinstance(self.parent, DFBlock):
             path = "%s.%s" % (self.parent.hierarchicalPath(), path)
+        self.__path = path
         return path
 
     def getRootBlock(self):
@@ -73,13 +260,21 @@ class DFBlock(DFBase):
             return self
 
     def getProject(self):
-        """ Resolves the root block of the design, and then gets its parent DFProject """
+        """
+        Resolves the root block of the design, and then gets its parent
+        DFProject. The project is cached (on this block and each block above it)
+        until the block or one above it is renamed or moved.
+        """
+        project = self.__project
+        if project is not None:
+            return project
         from .project import DFProject
-        root = self.getRootBlock()
-        if root != None and root.parent != None and isinstance(root.parent, DFProject):
-            return root.parent
-        else:
-            return None
+        if isinstance(self.parent, DFBlock):
+            project = self.parent.getProject()
+        elif isinstance(self.parent, DFProject):
+            project = self.parent
+        self.__project = project
+        return project
 
     def resolvePath(self, path):
         """ Return a DFPort or DFBlock definition based on a hierarchical path
@@ -90,6 +285,11 @@ class DFBlock(DFBase):
         # We expect a path of the form: parent.child.grandchild[portname]
         #  - We can also support 'parent.child' and '[portname]'
 
+        # While the tree is being reloaded, every block and port created so far
+        # is indexed by its full path - so references resolve without a search
+        if self.__path_index != None and path in self.__path_index:
+            return self.__path_index[path]
+
         # Now extract lookup path segments
         parts     = re.compile(r"^([\w\.\-]+)?(\[[\w\-]+\])?$").search(path).groups()
         sections  = parts[0].split('.') if parts[0] != None else []
@@ -148,6 +348,7 @@ class DFBlock(DFBase):
             raise Exception("Register is not of type DFRegister or DFRegisterGroup")
         register.block = self
         self.registers.append(register)
+        self.markDirty()
 
     def addChild(self, child):
         """ Attach a DFBlock to this block as a child node
@@ -157,7 +358,10 @@ class DFBlock(DFBase):
         """
         if not isinstance(child, DFBlock):
             raise Exception("Child is not of type DFBlock")
+        if child.parent is not self:
+            child.parent = self
         self.children.append(child)
+        self.markDirty()
 
     def addPort(self, port):
         """ Attach a new port to this block (can be input, output, or bidirectional)
@@ -167,6 +371,7 @@ class DFBlock(DFBase):
         """
         if not isinstance(port, DFPort):
             raise Exception("Port is not of type DFPort")
+        port.block = self
         if port.direction == DFConstants.DIRECTION.INPUT:
             self.ports.input.append(port)
         elif port.direction == DFConstants.DIRECTION.OUTPUT:
@@ -175,6 +380,7 @@ class DFBlock(DFBase):
             self.ports.inout.append(port)
         else:
             raise Exception("Unsupported port direction: " + port.direction)
+        self.markDirty()
 
     def getPrincipalSignal(self, intc_type):
         """
@@ -273,9 +479,44 @@ class DFBlock(DFBase):
         """
         if not isinstance(start_port, DFPort) or not isinstance(end_port, DFPort):
             raise Exception("Port is not of type DFPort")
-        self.connections.append(DFConnection(
-            start_port, start_index, end_port, end_index
-        ))
+        if isinstance(self.connections, DFConnectionTable):
+            self.connections.addConnection(start_port, start_index, end_port, end_index)
+        else:
+            self.connections.append(DFConnection(
+                start_port, start_index, end_port, end_index
+            ))
+        self.markDirty()
+
+    def compactConnections(self, recurse=False):
+        """
+        Move the connections held by this block into a DFConnectionTable, which
+        stores each connection as a row of integers rather than an object. The
+        'connections' of the block and the results of DFPort queries are then
+        read-only views constructed on demand (see DFConnectionView), which can
+        be removed from the table but not modified. The ports' own 'connections'
+        lists only hold those connections that can't be stored as rows (tie-offs
+        and those with attributes or a description). Connections added later
+        are stored in the table directly.
+
+        Args:
+            recurse: Whether to compact the connections of every block below
+                     this one as well
+        """
+        if not isinstance(self.connections, DFConnectionTable):
+            table  = DFConnectionTable(self)
+            detach = {}
+            for conn in self.connections:
+                table.append(conn, detach=False)
+                if DFConnectionTable.isColumnar(conn):
+                    detach.setdefault(conn.start_port, []).append(conn)
+                    detach.setdefault(conn.end_port, []).append(conn)
+            for port, conns in detach.items():
+                port.detachConnections(conns)
+            self.connections = table
+        if recurse:
+            for child in self.children:
+                child.compactConnections(True)
+        return self
 
     def addTieOff(self, port, signal_index, constant):
         """
@@ -292,6 +533,7 @@ class DFBlock(DFBase):
         elif not isinstance(constant, DFConstantTie):
             raise Exception("Constant is not of type DFConstantTie")
         self.connections.append(DFConnection(constant, 0, port, signal_index))
+        self.markDirty()
 
     def getInterconnectTypes(self, depth=None):
         """
@@ -408,12 +650,41 @@ class DFBlock(DFBase):
         # Otherwise there isn't a pathway
         return None
 
-    def dumpObject(self, project):
-        """ Dump out this node so that it can be reloaded
+    def dumpObject(self, project, contents=True, workers=None, cached=True):
+        """
+        Dump out this node so that it can be reloaded. A full dump is cached on
+        the block and returned again by later calls until the block, or any
+        node within it, is modified - so re-dumping a design after a small edit
+        only serialises the blocks containing the change. The returned object
+        must therefore be treated as read-only.
 
         Args:
-            project: Project definition used to calculate references
+            project : Project definition used to calculate references
+            contents: Whether to include the children, connections, registers
+                      and address map (otherwise only the block's own properties
+                      and ports are dumped)
+            workers : Number of processes to dump the children of this block
+                      with, in parallel (see parallel.py)
+            cached  : Whether cached dumps may be reused, otherwise the block
+                      and everything below it are dumped afresh in this process
+                      (see verifyCache)
         """
+        # Reuse the cached dump if nothing has changed since it was taken
+        if contents and cached and self.__isDumped(project):
+            return self.__dump[1]
+
+        # Dump the children in parallel. The nodes dumped by the workers are not
+        # tracked here (see DFBase.holdCache), so modifications to them would not
+        # be reported - neither their dumps nor this one can be cached
+        dumped = {}
+        if contents and cached and workers != None:
+            pending = [x for x in self.children if not x.__isDumped(project)]
+            with openPool(workers if len(pending) > 1 else None, (pending, project)) as pool:
+                if pool != None:
+                    dumps = pool.map(dumpShared, range(len(pending)))
+                    for child, obj in zip(pending, dumps):
+                        dumped[id(child)] = obj
+
         # Get our base object
         obj = super(DFBlock, self).dumpObject(project)
 
@@ -433,8 +704,14 @@ class DFBlock(DFBase):
             'inout' : [x.dumpObject(project) for x in self.ports.inout]
         }
 
+        if not contents:
+            return obj
+
         # Attach all children
-        obj['children'] = [x.dumpObject(project) for x in self.children]
+        obj['children'] = [
+            dumped[id(x)] if id(x) in dumped else x.dumpObject(project, cached=cached)
+            for x in self.children
+        ]
 
         # Attach all connections
         obj['connections'] = [x.dumpObject(project) for x in self.connections]
@@ -446,27 +723,93 @@ class DFBlock(DFBase):
         if self.address_map:
             obj['address_map'] = self.address_map.dumpObject(project)
 
-        # Return the object
+        # Cache and return the object. Contents that were loaded lazily are
+        # constructed while they're dumped, which reports a modification and so
+        # stops the block being tracked - it's tracked again as it's now cached
+        if len(dumped) == 0:
+            self.holdCache()
+            self.__dump = (project, obj)
         return obj
 
-    def loadObject(self, obj, root=None):
+    def __isDumped(self, project):
+        """ Check whether the cached dump of this block is still valid
+
+        Args:
+            project: Project definition the dump is required for
+        """
+        cached = self.__dump
+        return cached != None and cached[0] is project
+
+    def dumpStream(self, fh, project):
+        """
+        Write out this node as JSON to a file object, producing exactly the same
+        output as json.dumps(block.dumpObject(project)). Child blocks are written
+        recursively and every other entry is written as it is dumped, so the
+        serialised form of the whole tree is never held in memory.
+
+        Args:
+            fh     : File handle (opened in text mode) to write to
+            project: Project definition used to calculate references
+        """
+        # Write the block's own properties, leaving the object open
+        fh.write(json.dumps(self.dumpObject(project, contents=False))[:-1])
+
+        # Write each child block, connection and register group in turn
+        for key, items in (
+            ('children'   , self.children   ),
+            ('connections', self.connections),
+            ('registers'  , self.registers  ),
+        ):
+            fh.write(', ' + json.dumps(key) + ': [')
+            for index, item in enumerate(items):
+                if index > 0:
+                    fh.write(', ')
+                if isinstance(item, DFBlock):
+                    item.dumpStream(fh, project)
+                else:
+                    fh.write(json.dumps(item.dumpObject(project)))
+            fh.write(']')
+
+        # Write the address map if present
+        if self.address_map:
+            fh.write(
+                ', ' + json.dumps('address_map') + ': ' +
+                json.dumps(self.address_map.dumpObject(project))
+            )
+
+        fh.write('}')
+
+    def loadObject(self, obj, root=None, lazy=False, trusted=False, include=None):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
-            types: Map from class name to class definition
+            obj    : Description of this node
+            root   : Root object in the tree
+            lazy   : Defer constructing the contents of every block below the
+                     root until they are first accessed (see materialise)
+            trusted: Skip validation of the loaded values (see validate)
+            include: Hierarchical path patterns (which may contain wildcards)
+                     of the blocks to construct - along with the blocks below
+                     and above them, all other blocks are skipped along with
+                     any connections or address map entries that refer to them
         """
-        super(DFBlock, self).loadObject(obj, root)
+        # If we're the root, then build up an index of all of the blocks and
+        # ports as they are created - this is used by resolvePath to service
+        # lookups made by the rest of the tree during the load
+        if root == None:
+            self.__path_index = {}
+            try:
+                return self.loadObject(obj, self, lazy, trusted, include)
+            finally:
+                self.__path_index = None
 
-        # Work out if we're the root?
-        root = root if root != None else self
+        super(DFBlock, self).loadObject(obj, root)
 
         # Lookup our parent
         if 'parent' in obj and obj['parent']:
             self.parent = root.resolvePath(obj['parent'])
 
-        self.type = obj['type']
+        self.type = internString(obj['type'])
 
         # At this point, register against my parent so that sub-blocks can use
         # path resolving.
@@ -476,61 +819,361 @@ class DFBlock(DFBase):
         if 'ports' in obj and 'input' in obj['ports']:
             for item in obj['ports']['input']:
                 self.ports.input.append(
-                    (DFPort(direction=DFConstants.DIRECTION.INPUT, block=self)).loadObject(item, root)
+                    (DFPort(direction=DFConstants.DIRECTION.INPUT, block=self)).loadObject(item, root, trusted)
                 )
 
         if 'ports' in obj and 'output' in obj['ports']:
             for item in obj['ports']['output']:
                 self.ports.output.append(
-                    (DFPort(direction=DFConstants.DIRECTION.OUTPUT, block=self)).loadObject(item, root)
+                    (DFPort(direction=DFConstants.DIRECTION.OUTPUT, block=self)).loadObject(item, root, trusted)
                 )
 
         if 'ports' in obj and 'inout' in obj['ports']:
             for item in obj['ports']['inout']:
                 self.ports.inout.append(
-                    (DFPort(direction=DFConstants.DIRECTION.INOUT, block=self)).loadObject(item, root)
+                    (DFPort(direction=DFConstants.DIRECTION.INOUT, block=self)).loadObject(item, root, trusted)
                 )
 
+        # Register with the root's path index so that the tree below (and any
+        # connections) can find this block and its ports
+        if isinstance(root, DFBlock) and root.__path_index != None:
+            self.__indexPaths(root.__path_index)
+
+        # When loading lazily, hold onto the serialised contents of every block
+        # other than the root - removing the attributes means that the first
+        # access to any of them falls through to __getattribute__
+        if lazy and root is not self:
+            self.__lazy = (
+                { x: obj[x] for x in DFBlock.CONTENTS if x in obj }, root, trusted,
+                include
+            )
+            del self.children, self.connections, self.registers, self.address_map
+        else:
+            self.__loadContents(obj, root, lazy, trusted, include)
+
+        return self
+
+    def __indexPaths(self, index):
+        """ Add this block and all of its ports into a path index
+
+        Args:
+            index: The path index to populate
+        """
+        path        = self.hierarchicalPath()
+        index[path] = self
+        for port in (self.ports.input + self.ports.output + self.ports.inout):
+            index[path + '[' + port.name + ']'] = port
+
+    def __isIncluded(self, path, include):
+        """
+        Check whether a block referenced by this block's contents (e.g. the end
+        of a connection) will be constructed when loading with include patterns.
+
+        Args:
+            path   : Hierarchical path of the referenced block
+            include: Include patterns applied to this block's children
+        """
+        return path == self.hierarchicalPath() or matchInclude(path, include)[0]
+
+    def __loadChild(self, obj, root, lazy, trusted, include):
+        """ Reload a child block, if it is selected by the include patterns
+
+        Args:
+            obj    : Description of the child
+            root   : Root object in the tree
+            lazy   : Whether the child should be loaded lazily
+            trusted: Skip validation of the loaded values
+            include: Include patterns applied to this block's children
+        """
+        if include != None:
+            path = obj['path'] if 'path' in obj else (self.hierarchicalPath() + '.' + obj['id'])
+            keep, include = matchInclude(path, include)
+            if not keep:
+                return None
+        return (DFBlock()).loadObject(obj, root, lazy, trusted, include)
+
+    def __loadConnection(self, obj, root, trusted, include):
+        """
+        Reload a connection between this block and its children, unless one of
+        its ends is on a block excluded by the include patterns.
+
+        Args:
+            obj    : Description of the connection
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values
+            include: Include patterns applied to this block's children
+        """
+        if include != None:
+            ends = [obj['end_port']] + ([obj['start_port']] if 'start_port' in obj else [])
+            if not all(self.__isIncluded(x['block'], include) for x in ends):
+                return None
+        conn = (DFConnection()).loadObject(obj, root, trusted)
+        self.connections.append(conn)
+        return conn
+
+    def __loadContents(self, obj, root, lazy=False, trusted=False, include=None):
+        """
+        Reload the registers, child blocks, connections and the address map of
+        this block - these all follow on from the block's own properties and
+        ports, which must already have been loaded.
+
+        Args:
+            obj    : Description of this node
+            root   : Root object in the tree
+            lazy   : Whether child blocks should be loaded lazily
+            trusted: Skip validation of the loaded values
+            include: Include patterns applied to the child blocks
+        """
         if 'registers' in obj:
             for item in obj['registers']:
-                self.addRegister((DFRegisterGroup()).loadObject(item, root))
+                self.addRegister((DFRegisterGroup()).loadObject(item, root, trusted))
 
         if 'children' in obj:
             for item in obj['children']:
-                (DFBlock()).loadObject(item, root)
+                self.__loadChild(item, root, lazy, trusted, include)
 
         # Build out interconnections between my children
         if 'connections' in obj:
             for item in obj['connections']:
-                self.connections.append((DFConnection()).loadObject(item, root))
+                self.__loadConnection(item, root, trusted, include)
 
-        # Reload the address map for the block
+        # Reload the address map for the block, dropping any entries that refer
+        # to blocks excluded by the include patterns
         if 'address_map' in obj:
-            self.setAddressMap(DFAddressMap(self).loadObject(obj['address_map'], root))
+            map_obj = obj['address_map']
+            if include != None:
+                def keep(entry):
+                    return self.__isIncluded(entry['block'], include)
+                map_obj = dict(map_obj)
+                for key in ('initiators', 'targets'):
+                    if key in map_obj:
+                        map_obj[key] = [x for x in map_obj[key] if keep(x['port'])]
+                if 'constraints' in map_obj:
+                    map_obj['constraints'] = {
+                        k: v for k, v in map_obj['constraints'].items()
+                        if keep(v['initiator']) and keep(v['target'])
+                    }
+            self.setAddressMap(DFAddressMap(self).loadObject(map_obj, root, trusted))
+
+    def validate(self):
+        """
+        Check the ports, registers, connections and address map of this block
+        and of every block below it (materialising any lazily loaded blocks).
+        """
+        for port in (self.ports.input + self.ports.output + self.ports.inout):
+            port.validate()
+        for group in self.registers:
+            group.validate()
+        for child in self.children:
+            child.validate()
+        for conn in self.connections:
+            conn.validate()
+        if self.address_map:
+            self.address_map.validate()
+        return self
+
+    def isMaterialised(self):
+        """ Returns whether the contents of this block have been constructed """
+        return (self.__lazy == None)
+
+    def materialise(self):
+        """
+        Construct the registers, children, connections and address map of a
+        block that was reloaded lazily. This happens automatically the first
+        time any of them are accessed (for example when resolvePath or
+        chaseConnection walks through the block), so only needs to be called
+        to force it. Child blocks are in turn left to be materialised lazily,
+        and calling this on a fully loaded block has no effect.
+        """
+        if self.__lazy == None:
+            return self
+        contents, root, trusted, include = self.__lazy
+        self.__lazy      = None
+        self.children    = DFShortcutList("id", self)
+        self.connections = DFNodeList(owner=self)
+        self.registers   = DFShortcutList("id", self)
+        self.address_map = None
+        # Connections refer to the ports of this block and its children, so
+        # index them in the root while the contents are constructed
+        owner = (root.__path_index == None)
+        if owner:
+            root.__path_index = {}
+        try:
+            self.__indexPaths(root.__path_index)
+            self.__loadContents(contents, root, True, trusted, include)
+        finally:
+            if owner:
+                root.__path_index = None
+        return self
+
+    def loadStream(self, stream, root=None, lazy=False, trusted=False, include=None):
+        """
+        Reload this node from a DFStreamReader positioned at the start of its
+        dumped object. Child blocks and connections are constructed as each
+        entry is parsed, so the dictionary describing the whole subtree is never
+        held in memory. This relies on the block's own properties and ports
+        preceding its children, and children preceding connections, which is
+        the order that dumpObject writes them in - where connections appear
+        before the children they are buffered and loaded afterwards.
+
+        Args:
+            stream: The DFStreamReader to consume from
+            root  : Root object in the tree
+            lazy   : Defer constructing the contents of child blocks (in which
+                     case each child's serialised form is read in one go)
+            trusted: Skip validation of the loaded values (see validate)
+            include: Hierarchical path patterns of the blocks to construct (see
+                     loadObject) - if this block is not selected by them, then
+                     its dump is consumed and None is returned
+        """
+        # If we're the root, build up the path index (see loadObject)
+        if root == None:
+            self.__path_index = {}
+            try:
+                return self.loadStream(stream, self, lazy, trusted, include)
+            finally:
+                self.__path_index = None
+
+        def select():
+            # Check whether this block is selected, before it is constructed
+            if include == None:
+                return (True, None)
+            elif 'path' in head:
+                return matchInclude(head['path'], include)
+            elif head.get('parent'):
+                return matchInclude(head['parent'] + '.' + head['id'], include)
+            else:
+                return matchInclude(head['id'], include)
+
+        head     = {}
+        deferred = {}
+        started  = False
+        skipped  = False
+        for key in stream.iterObject():
+            if skipped:
+                stream.readValue()
+            elif key == 'children' or (key == 'connections' and started):
+                # The block itself must exist before any of its children
+                if not started:
+                    keep, include = select()
+                    if not keep:
+                        skipped = True
+                        stream.readValue()
+                        continue
+                    self.loadObject(head, root, lazy, trusted, include)
+                    started = True
+                for _ in stream.iterArray():
+                    if key == 'connections':
+                        self.__loadConnection(stream.readValue(), root, trusted, include)
+                    elif lazy:
+                        self.__loadChild(stream.readValue(), root, lazy, trusted, include)
+                    else:
+                        (DFBlock()).loadStream(stream, root, False, trusted, include)
+            elif key in DFBlock.CONTENTS:
+                deferred[key] = stream.readValue()
+            elif started:
+                raise Exception(
+                    "Cannot stream DFBlock " + self.hierarchicalPath() + " as '"
+                    + key + "' follows its children"
+                )
+            else:
+                head[key] = stream.readValue()
+
+        # Load anything that couldn't be constructed on the fly
+        if skipped:
+            return None
+        elif not started:
+            keep, include = select()
+            if not keep:
+                return None
+            head.update(deferred)
+            self.loadObject(head, root, lazy, trusted, include)
+        else:
+            self.__loadContents(deferred, root, lazy, trusted, include)
 
         return self
 
-    def __getattribute__(self, key):
+    def __getattr__(self, key):
         """
-        By overriding __getattribute__ we can expose any child blocks or registers
-        as if they were first class attributes of this object. Note that the code
-        prioritises true class properties.
+        By overriding __getattr__ we can expose any child blocks or registers
+        as if they were first class attributes of this object. Note that this is
+        only called when no true class property matches the key.
 
         Args:
             key: The key to resolve
         """
-        try:
-            return super(DFBlock, self).__getattribute__(key)
-        except AttributeError as e:
-            if len(self.children) > 0 and key in self.children.keys():
-                return self.children[key]
-            elif len(self.registers) > 0:
-                # Does the key relate to one of our register groups?
-                if key in self.registers.keys():
-                    return self.registers[key]
-                # Does the key relate to a register within one of the register groups?
-                for reg_grp in self.registers:
-                    if key in reg_grp.registers.keys():
-                        return reg_grp.registers[key]
-            # Otherwise, if we get this far without returning raise an exception
-            raise e
+        # The contents of a lazily loaded block are only constructed when they
+        # are first accessed
+        if self.__lazy != None and key in DFBlock.CONTENTS:
+            return getattr(self.materialise(), key)
+        entry = self.__findName(key)
+        if entry is None:
+            raise AttributeError(
+                "'%s' object has no attribute '%s'" % (type(self).__name__, key)
+            )
+        return entry
+
+    def __findName(self, key):
+        """
+        Lookup a child block, register group or register by its ID. The index
+        is discarded whenever entries are added to, removed from or renamed
+        within the lists it covers (see entriesChanged). A hit is checked
+        against the entry's ID and the node holding it, and as entries that are
+        not linked to the block can be renamed without it being told, a miss is
+        confirmed by rebuilding the index.
+
+        Args:
+            key: The ID to lookup
+        """
+        names = self.__names
+        if names is None:
+            return self.__indexNames().get(key)
+        entry = names.get(key)
+        if entry is None or not self.__holdsName(entry, key):
+            entry = self.__indexNames().get(key)
+        return entry
+
+    def __holdsName(self, entry, key):
+        """ Check that an indexed entry still has the ID and is held by the block
+
+        Args:
+            entry: The child block, register group or register
+            key  : The ID it was found under
+        """
+        if entry.id != key:
+            return False
+        elif isinstance(entry, DFBlock):
+            return entry.parent is self
+        elif isinstance(entry, DFRegisterGroup):
+            return entry.block is self
+        return isinstance(entry.group, DFRegisterGroup) and entry.group.block is self
+
+    def __indexNames(self):
+        """
+        Build the index of child blocks, register groups and registers, in order
+        of precedence - children first, then groups and then the registers
+        within each group.
+        """
+        names = {}
+        for child in self.children:
+            names.setdefault(child.id, child)
+        for group in self.registers:
+            names.setdefault(group.id, group)
+        for group in self.registers:
+            for reg in group.registers:
+                names.setdefault(reg.id, reg)
+        self.__names = names
+        return names
+
+    def heldLists(self):
+        """ Return the lists of child blocks, register groups and ports (see DFBase) """
+        ports = (self.ports.input, self.ports.output, self.ports.inout)
+        # The contents of a lazily loaded block are yet to be constructed
+        if self.__lazy != None:
+            return ports
+        return (self.children, self.registers) + ports
+
+    def entriesChanged(self):
+        """ Discard the index of names when children, groups or registers change """
+        if self.__names is not None:
+            self.__names = None
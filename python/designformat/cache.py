@@ -0,0 +1,269 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# On-disk cache of loaded projects. Each entry is keyed by a hash of the blob's
+# contents, and holds a pickled snapshot of the DFProject object graph that was
+# constructed from it - so restoring the snapshot skips parsing the blob and
+# rebuilding the nodes. Long chains of connections link the nodes too deeply to
+# pickle the graph in one go, so each node is first written as an empty object
+# and its attributes are written afterwards in breadth-first batches (see
+# SnapshotPickler), which keeps the recursion shallow.
+#
+# Snapshot layout:
+#
+#  - MAGIC
+#  - The fingerprint of the library that wrote the snapshot (see fingerprint),
+#    terminated by a newline
+#  - The pickled DFProject, as an empty object
+#  - A pickled batch of (node, attributes) pairs, for every node written as an
+#    empty object by the previous pickle, repeated until the batch is empty
+#  - A pickled None, marking the end of the snapshot
+
+import copyreg
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+from designformat import DFConstants
+
+from .base import DFBase
+
+MAGIC  = b"DFSNAP\x03"
+SUFFIX = ".dfsnap"
+
+# Fingerprint of the library, calculated on first use
+_fingerprint = None
+
+def fingerprint():
+    """
+    Return a fingerprint identifying this version of the library - formed from
+    the format version and the source of every module in the package, so that a
+    snapshot is only restored by the exact code that wrote it.
+    """
+    global _fingerprint
+    if _fingerprint == None:
+        digest = hashlib.sha256(DFConstants.FORMAT.VERSION.encode('utf-8'))
+        folder = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.py'):
+                with open(os.path.join(folder, name), 'rb') as fh:
+                    digest.update(name.encode('utf-8'))
+                    digest.update(fh.read())
+        _fingerprint = digest.hexdigest().encode('utf-8')
+    return _fingerprint
+
+class SnapshotPickler(pickle.Pickler):
+    """
+    Pickler which writes each DFBase node as an empty object, queueing it so
+    that its attributes can be written later (see dumpProject).
+    """
+
+    def __init__(self, fh):
+        """ Construct the pickler
+
+        Args:
+            fh: File handle (opened in binary mode) to write to
+        """
+        super(SnapshotPickler, self).__init__(fh, protocol=pickle.HIGHEST_PROTOCOL)
+        self.pending = []
+
+    def reducer_override(self, obj):
+        """ Write a node as an empty object, and queue it
+
+        Args:
+            obj: The object being pickled
+        """
+        if not isinstance(obj, DFBase):
+            return NotImplemented
+        self.pending.append(obj)
+        return (copyreg.__newobj__, (type(obj), ))
+
+def dumpProject(fh, project):
+    """ Pickle a DFProject into a snapshot (see the layout above)
+
+    Args:
+        fh     : File handle (opened in binary mode) to write to
+        project: The DFProject to pickle
+    """
+    pickler = SnapshotPickler(fh)
+    pickler.dump(project)
+    while len(pickler.pending) > 0:
+        batch, pickler.pending = pickler.pending, []
+        pickler.dump([(x, x.__getstate__()) for x in batch])
+    pickler.dump(None)
+
+def loadProject(fh):
+    """ Unpickle a DFProject from a snapshot (see dumpProject)
+
+    Args:
+        fh: File handle (opened in binary mode) to read from
+    """
+    unpickler = pickle.Unpickler(fh)
+    project   = unpickler.load()
+    while True:
+        batch = unpickler.load()
+        if batch == None:
+            return project
+        for node, state in batch:
+            node.__setstate__(state)
+
+def hashFile(path, chunk_size=(1 << 20)):
+    """ Calculate the SHA-256 hash of a file's contents
+
+    Args:
+        path      : Path to the file
+        chunk_size: Number of bytes to read at a time
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DFLoadCache(object):
+    """
+    Directory of DFProject snapshots keyed by the hash of the blob they were
+    loaded from. Snapshots written by a different version of the library, or
+    which are truncated or corrupt, are treated as misses and removed. The directory is
+    kept within a maximum total size and snapshots are dropped once they have
+    not been used for a maximum age - the least recently used are evicted first.
+    """
+
+    def __init__(self, cache_dir, max_size=(2 << 30), max_age=(7 * 24 * 60 * 60)):
+        """ Constructor for the cache
+
+        Args:
+            cache_dir: Directory to hold the snapshots (created if necessary)
+            max_size : Maximum total size of the snapshots in bytes (None for
+                       no limit)
+            max_age  : Maximum number of seconds since a snapshot was last used
+                       (None for no limit)
+        """
+        self.cache_dir = cache_dir
+        self.max_size  = max_size
+        self.max_age   = max_age
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def getKey(self, path, options=None):
+        """ Return the key of the snapshot for a blob
+
+        Args:
+            path   : Path to the blob
+            options: Options affecting the loaded project (e.g. lazy loading),
+                     which are included in the key
+        """
+        key = hashFile(path)
+        for opt_key, opt_val in sorted((options or {}).items()):
+            if opt_val:
+                key += "-" + opt_key
+        return key
+
+    def getPath(self, key):
+        """ Return the path of the snapshot for a key
+
+        Args:
+            key: The key of the snapshot
+        """
+        return os.path.join(self.cache_dir, key + SUFFIX)
+
+    def lookup(self, key):
+        """ Restore the DFProject held for a key, returns None on a miss
+
+        Args:
+            key: The key of the snapshot
+        """
+        path = self.getPath(key)
+        try:
+            with open(path, 'rb') as fh:
+                if fh.read(len(MAGIC)) != MAGIC or fh.readline()[:-1] != fingerprint():
+                    project = None
+                else:
+                    project = loadProject(fh)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError):
+            project = None
+        if project == None:
+            self.remove(key)
+            return None
+        # Record the use of the snapshot for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return project
+
+    def store(self, key, project):
+        """
+        Snapshot a DFProject under a key, then evict old snapshots. The snapshot
+        is written to a temporary file and moved into place, so concurrent users
+        of the cache never observe a partial snapshot. The contents of lazily
+        loaded blocks are kept unconstructed in the snapshot.
+
+        Args:
+            key    : The key of the snapshot
+            project: The DFProject to store
+        """
+        handle, temp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as fh:
+                fh.write(MAGIC + fingerprint() + b"\n")
+                dumpProject(fh, project)
+            os.replace(temp, self.getPath(key))
+        except:
+            os.remove(temp)
+            raise
+        self.evict()
+
+    def remove(self, key):
+        """ Remove the snapshot for a key, if it exists
+
+        Args:
+            key: The key of the snapshot
+        """
+        try:
+            os.remove(self.getPath(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """
+        Remove snapshots that haven't been used within the maximum age, and then
+        the least recently used snapshots until the cache fits the maximum size.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name[:-len(SUFFIX)]))
+        entries.sort()
+        total = sum(x[1] for x in entries)
+        now   = time.time()
+        for used, size, key in entries:
+            expired  = (self.max_age  != None and (now - used) > self.max_age)
+            oversize = (self.max_size != None and total > self.max_size)
+            if not (expired or oversize):
+                continue
+            self.remove(key)
+            total -= size
@@ -19,7 +19,7 @@
 from designformat import DFConstants
 
 from .base import DFBase
-from .common import DFShortcutList
+from .common import DFShortcutList, internString
 from .command_field import DFCommandField
 
 class DFCommand(DFBase):
@@ -30,6 +30,9 @@ class DFCommand(DFBase):
     can overlap if necessary (for commands with multiple parameter options).
     """
 
+    # The cached content hash is discarded when the command is marked dirty
+    __slots__ = ('width', 'fields', 'fieldtype', '__hash')
+
     def __init__(self, id=None, width=None, description=None):
         """ Construct a command object
 
@@ -40,8 +43,9 @@ class DFCommand(DFBase):
         """
         super(DFCommand, self).__init__(id, description)
         self.width     = width
-        self.fields    = DFShortcutList('id')
+        self.fields    = DFShortcutList('id', self)
         self.fieldtype = DFCommandField
+        self.__hash    = None
 
     def addField(self, field):
         """ Add a field to the command store and sort the field store by LSB
@@ -54,13 +58,36 @@ class DFCommand(DFBase):
                 "Tried to append non " + self.fieldtype.__name__ + " to " +
                 type(self).__name__
             )
+        field.command = self
         self.fields.append(field)
         self.sortFields()
+        self.markDirty()
 
     def sortFields(self):
         """ Ensures fields are in ascending LSB order. """
         self.fields.sort(key=lambda x: x.lsb)
 
+    def validate(self):
+        """ Sort and check all of the fields held by the command """
+        self.sortFields()
+        for field in self.fields:
+            field.validate()
+        return self
+
+    def contentHash(self, cached=True):
+        """ Return the hash of the command and its fields (see DFBase) """
+        if self.__hash == None or not cached:
+            self.__hash = super(DFCommand, self).contentHash(cached)
+        return self.__hash
+
+    def heldLists(self):
+        """ Return the list of fields (see DFBase) """
+        return (self.fields, )
+
+    def discardCache(self):
+        """ Discard the cached hash (see DFBase.markDirty) """
+        self.__hash = None
+
     def dumpObject(self, project):
         """ Dump out this node so that it can be reloaded
 
@@ -74,35 +101,46 @@ class DFCommand(DFBase):
 
         return obj
 
-    def loadObject(self, obj, root):
+    def loadObject(self, obj, root, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
-            types: Map from class name to class definition
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate), the
+                     fields are assumed to already be in order
         """
         super(DFCommand, self).loadObject(obj, root)
 
+        # The same names are repeated in every instance of a register map
+        self.id = internString(self.id)
+
         if 'width' in obj:
             self.width = obj['width']
 
-        if 'fields' in obj:
+        if 'fields' in obj and trusted:
+            for item in obj['fields']:
+                field         = (self.fieldtype()).loadObject(item, root, True)
+                field.command = self
+                self.fields.append(field)
+        elif 'fields' in obj:
             for field in obj['fields']:
                 self.addField((self.fieldtype()).loadObject(field, root))
 
-        self.sortFields()
+        if not trusted:
+            self.sortFields()
 
         return self
 
-    def __getattribute__(self, key):
+    def __getattr__(self, key):
         """
-        By overriding __getattribute__ we can expose all fields as if they were
-        first class attributes of this object. Note true first-class properties
-        are prioritised over child fields.
+        By overriding __getattr__ we can expose all fields as if they were first
+        class attributes of this object. Note that this is only called when no
+        true class property matches the key.
         """
-        try:
-            result = super(DFCommand, self).__getattribute__(key)
-            return result
-        except AttributeError as e:
-            return self.fields[key]
+        # The fields are themselves an attribute (unset while unpickling)
+        if key == 'fields':
+            raise AttributeError(
+                "'%s' object has no attribute '%s'" % (type(self).__name__, key)
+            )
+        return self.fields[key]
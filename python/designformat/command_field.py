@@ -17,7 +17,7 @@
 #
 
 from .base import DFBase
-from .common import convert_to_class, isNaN
+from .common import convert_to_class, internString, isNaN
 from .define import DFDefine
 
 class DFCommandField(DFBase):
@@ -29,6 +29,11 @@ class DFCommandField(DFBase):
     required, to allow specific control values to be named.
     """
 
+    __slots__ = ('lsb', 'size', 'reset', 'signed', 'enum', 'command')
+
+    OWNERS  = ('command',)
+    INDEXED = True
+
     def __init__(
         self, id=None, lsb=None, size=None, reset=None, signed=False,
         description=None
@@ -44,7 +49,8 @@ class DFCommandField(DFBase):
         """
         super(DFCommandField, self).__init__(id, description)
 
-        self.enum = convert_to_class({})
+        self.command = None # The DFCommand holding this field
+        self.enum    = convert_to_class({}, self)
 
         if (lsb != None) or (size != None) or (reset != None):
             if (isNaN(lsb)):
@@ -79,6 +85,11 @@ class DFCommandField(DFBase):
                 str(self.reset) + " is out of range"
             )
 
+    def validate(self):
+        """ Check that the values assigned to the field are sensible """
+        self.check()
+        return self
+
     def addEnumValue(self, key, value, description=None):
         """ Create a new named value for the register
 
@@ -87,7 +98,7 @@ class DFCommandField(DFBase):
             value      : Value to be associated
             description: Human-readable description
         """
-        self.enum[key] = DFDefine(key, int(value), description)
+        self.enum[key] = DFDefine(key, int(value), description, self)
 
     def dumpObject(self, project):
         """ Dump out this node so that it can be reloaded
@@ -107,28 +118,32 @@ class DFCommandField(DFBase):
 
         return obj
 
-    def loadObject(self, obj, root):
+    def loadObject(self, obj, root, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
-            types: Map from class name to class definition
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate)
         """
         super(DFCommandField, self).loadObject(obj, root)
 
+        # The same names are repeated in every instance of a register map
+        self.id = internString(self.id)
+
         self.lsb    = int(obj['lsb'])
         self.size   = int(obj['size'])
         self.reset  = int(obj['reset'])
         self.signed = obj['signed']
 
         # Reload enumerated values
-        self.enum  = convert_to_class({})
+        self.enum  = convert_to_class({}, self)
         if 'enum' in obj:
             for key in obj['enum']:
-                self.enum[key] = DFDefine().loadObject(obj['enum'][key], root)
+                self.enum[key] = DFDefine(owner=self).loadObject(obj['enum'][key], root)
 
         # Perform sanity checks
-        self.check()
+        if not trusted:
+            self.check()
 
         return self
@@ -17,142 +17,491 @@
 #
 
 from datetime import datetime
+from fnmatch import fnmatchcase
+import hashlib
+import json
+from operator import attrgetter
+import sys
+
+## DFNodeList
+#  List of the nodes held by another node (its owner), which reports every
+#  modification to the owner by calling its markDirty method - so that any
+#  cached dump or hash derived from the list is discarded (see DFBase.markDirty).
+#
+class DFNodeList(list):
+
+    # Class-level default, so that the owner always resolves (even while the
+    # list is populated during unpickling, before its state is restored)
+    __owner = None
+
+    def __init__(self, entries=(), owner=None):
+        super(DFNodeList, self).__init__(entries)
+        self.__owner = owner
+
+    ## __changed
+    #  Report a modification of the list to its owner
+    #
+    def __changed(self):
+        if self.__owner is not None:
+            self.__owner.markDirty()
+
+    ## getOwner
+    #  Return the node holding the list
+    #
+    def getOwner(self):
+        return self.__owner
+
+    ## __getstate__
+    #  Only pickle the owner, the entries are pickled as those of any list
+    #
+    def __getstate__(self):
+        return { '_DFNodeList__owner': self.__owner }
+
+    ## __setstate__
+    #  Restore attributes when unpickling
+    #
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def append(self, entry):
+        super(DFNodeList, self).append(entry)
+        self.__changed()
+
+    def extend(self, entries):
+        super(DFNodeList, self).extend(entries)
+        self.__changed()
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    def insert(self, index, entry):
+        super(DFNodeList, self).insert(index, entry)
+        self.__changed()
+
+    def remove(self, entry):
+        super(DFNodeList, self).remove(entry)
+        self.__changed()
+
+    def pop(self, *args):
+        entry = super(DFNodeList, self).pop(*args)
+        self.__changed()
+        return entry
+
+    def clear(self):
+        super(DFNodeList, self).clear()
+        self.__changed()
+
+    # Sorting is only reported if it changes the order, as lists are re-sorted
+    # whenever their holder is validated
+    def sort(self, *args, **kwargs):
+        order = list(map(id, self))
+        super(DFNodeList, self).sort(*args, **kwargs)
+        if list(map(id, self)) != order:
+            self.__changed()
+
+    def reverse(self):
+        super(DFNodeList, self).reverse()
+        self.__changed()
+
+    def __setitem__(self, index, value):
+        super(DFNodeList, self).__setitem__(index, value)
+        self.__changed()
+
+    def __delitem__(self, index):
+        super(DFNodeList, self).__delitem__(index)
+        self.__changed()
+
+    def __imul__(self, count):
+        super(DFNodeList, self).__imul__(count)
+        self.__changed()
+        return self
+
+## DFNodeDict
+#  Dictionary held by a node (for example its attributes), which reports every
+#  modification to the node by calling its markDirty method (see DFNodeList).
+#
+class DFNodeDict(dict):
+
+    # Class-level default, so that the owner always resolves while unpickling
+    __owner = None
+
+    def __init__(self, entries=(), owner=None):
+        super(DFNodeDict, self).__init__(entries)
+        self.__owner = owner
+
+    ## __changed
+    #  Report a modification of the dictionary to its owner
+    #
+    def __changed(self):
+        if self.__owner is not None:
+            self.__owner.markDirty()
+
+    def __setitem__(self, key, value):
+        super(DFNodeDict, self).__setitem__(key, value)
+        self.__changed()
+
+    def __delitem__(self, key):
+        super(DFNodeDict, self).__delitem__(key)
+        self.__changed()
+
+    def pop(self, key, *args):
+        present = key in self
+        value   = super(DFNodeDict, self).pop(key, *args)
+        if present:
+            self.__changed()
+        return value
+
+    def popitem(self):
+        item = super(DFNodeDict, self).popitem()
+        self.__changed()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def update(self, *args, **kwargs):
+        super(DFNodeDict, self).update(*args, **kwargs)
+        self.__changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super(DFNodeDict, self).clear()
+        self.__changed()
 
 ## DFShortcutList
 #  Provides a list-like object with the ability to access entries by an attribute
 #  on the list object. For example, if the list contains DFBlock objects then I
 #  can access entries by going 'my_block_list[0]' or 'my_block_list.my_sub_block'
 #
-class DFShortcutList(list):
+#  Lookups are served from an index of key to entry (the first entry where keys
+#  are repeated), which is kept up to date as entries are added and removed, and
+#  is told by the node holding the list when an entry is renamed (see rekey and
+#  DFBase.heldLists) - so a missing key is reported without searching the list.
+#  Only modifications that could change which of several entries sharing a key
+#  comes first discard the index, for it to be rebuilt by the next lookup. As a
+#  DFNodeList, modifications are reported to the node holding the list, which
+#  is also told whenever entries are added, removed or renamed (see
+#  DFBase.entriesChanged).
+#
+class DFShortcutList(DFNodeList):
+
+    # Class-level defaults, so that the attributes always resolve (even while
+    # the list is populated during unpickling, before its state is restored)
+    __shortcut_key = "id"
+    __index        = None
+    __repeated     = False
 
-    def __init__(self, shortcut_key="id"):
-        super(list, self).__init__()
+    def __init__(self, shortcut_key="id", owner=None):
+        super(DFShortcutList, self).__init__(owner=owner)
         self.__shortcut_key = shortcut_key
 
+    ## __reindex
+    #  Rebuild the index from the current entries and their keys
+    #
+    def __reindex(self):
+        index    = {}
+        repeated = False
+        for key, entry in zip(self.keys(), self):
+            if key in index:
+                repeated = True
+            else:
+                index[key] = entry
+        self.__index    = index
+        self.__repeated = repeated
+        return index
+
+    ## __invalidate
+    #  Discard the index, so that it is rebuilt by the next lookup
+    #
+    def __invalidate(self):
+        self.__index = None
+
+    ## __entriesChanged
+    #  Tell the node holding the list that entries were added, removed or renamed
+    #
+    def __entriesChanged(self):
+        owner = self.getOwner()
+        if owner is not None:
+            owner.entriesChanged()
+
+    ## __drop
+    #  Remove an entry which has been taken out of the list from the index
+    #  @param entry - The entry removed
+    #
+    def __drop(self, entry):
+        if self.__index is None:
+            return
+        if self.__repeated:
+            self.__invalidate()
+            return
+        key = getattr(entry, self.__shortcut_key)
+        if self.__index.get(key) is entry:
+            del self.__index[key]
+
+    ## rekey
+    #  Update the index after an entry has been renamed, this is called by the
+    #  node holding the list (see DFBase.heldLists)
+    #  @param entry - The renamed entry, which may not be held by this list
+    #  @param key   - The attribute that was changed
+    #  @param old   - The previous value of the attribute
+    #
+    def rekey(self, entry, key, old):
+        if key != self.__shortcut_key:
+            return
+        index = self.__index
+        if index is None or self.__repeated:
+            self.__invalidate()
+            self.__entriesChanged()
+        elif index.get(old) is entry:
+            del index[old]
+            new = getattr(entry, key)
+            if new in index:
+                self.__invalidate()
+            else:
+                index[new] = entry
+            self.__entriesChanged()
+
     ## get_entry
     #  Return an entry by its key
     #  @param key - The key to lookup
     #
     def get_entry(self, key):
-        entry = [x for x in self if x.__getattribute__(self.__shortcut_key) == key]
-        return entry[0] if len(entry) > 0 else None
-
-    ## __getattribute__
-    # By overriding __getattribute__ we can expose any entries within the list
-    # as first class attributes.
-    #
-    def __getattribute__(self, key):
-        try:
-            result = super(list, self).__getattribute__(key)
-            return result
-        except AttributeError as e:
-            entry = self.get_entry(key)
-            if entry: return entry
-            else: raise e
+        index = self.__index if self.__index is not None else self.__reindex()
+        entry = index.get(key)
+        if entry is not None and getattr(entry, self.__shortcut_key) == key:
+            return entry
+        # Entries renamed without the list being told (those not linked to the
+        # node holding the list) leave the index stale, so a miss is confirmed
+        # by scanning the entries - rebuilding the index if the key is found
+        if entry is None and not any(
+            getattr(x, self.__shortcut_key) == key for x in self
+        ):
+            return None
+        return self.__reindex().get(key)
+
+    ## __getattr__
+    # By overriding __getattr__ we can expose any entries within the list as
+    # first class attributes - this is only called when normal attribute
+    # lookup fails.
+    #
+    def __getattr__(self, key):
+        entry = self.get_entry(key)
+        if entry is not None: return entry
+        raise AttributeError(
+            "'%s' object has no attribute '%s'" % (type(self).__name__, key)
+        )
 
     ## __getitem__
     #  Override __getitem__ to allow either indexing of the values, or if a string
-    #  is provided then reuse __getattribute__ to lookup by key.
+    #  is provided then reuse __getattr__ to lookup by key.
     #
     def __getitem__(self, key):
         if isinstance(key, str):
             entry = self.get_entry(key)
-            if entry: return entry
+            if entry is not None: return entry
             else: return self.__getattribute__(key)
         else:
             return super(DFShortcutList, self).__getitem__(key)
 
+    ## __contains__
+    #  Test membership of either an entry, or if a string is provided then of an
+    #  entry with that key.
+    #
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return self.get_entry(item) is not None
+        return super(DFShortcutList, self).__contains__(item)
+
+    ## __getstate__
+    #  Only pickle the owner and shortcut key, the index is rebuilt on first
+    #  lookup
+    #
+    def __getstate__(self):
+        state = super(DFShortcutList, self).__getstate__()
+        state['_DFShortcutList__shortcut_key'] = self.__shortcut_key
+        return state
+
+    ## __setstate__
+    #  Restore attributes when unpickling
+    #
+    def __setstate__(self, state):
+        super(DFShortcutList, self).__setstate__(state)
+        self.__invalidate()
+
     ## keys
     #  Return a list of the keying variable for each item in the list.
     #
     def keys(self):
-        return [x.__getattribute__(self.__shortcut_key) for x in self]
+        return list(map(attrgetter(self.__shortcut_key), self))
 
-# ------------------------------------------------------------------------------
-# Magic dictionary->namespace conversion
-# ------------------------------------------------------------------------------
+    # Appending extends the index in place, so that building up a list while
+    # looking up its entries (as happens during loading) remains linear
+    def append(self, entry):
+        super(DFShortcutList, self).append(entry)
+        if self.__index is not None:
+            key = getattr(entry, self.__shortcut_key)
+            if key in self.__index:
+                self.__repeated = True
+            else:
+                self.__index[key] = entry
+        self.__entriesChanged()
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    def insert(self, index, entry):
+        super(DFShortcutList, self).insert(index, entry)
+        if self.__index is not None:
+            key = getattr(entry, self.__shortcut_key)
+            # A repeated key may now be held first by the inserted entry
+            if key in self.__index:
+                self.__invalidate()
+            else:
+                self.__index[key] = entry
+        self.__entriesChanged()
+
+    def remove(self, entry):
+        super(DFShortcutList, self).remove(entry)
+        self.__drop(entry)
+        self.__entriesChanged()
+
+    def pop(self, *args):
+        entry = super(DFShortcutList, self).pop(*args)
+        self.__drop(entry)
+        self.__entriesChanged()
+        return entry
+
+    def clear(self):
+        super(DFShortcutList, self).clear()
+        self.__invalidate()
+        self.__entriesChanged()
+
+    # Reordering only affects the index where keys are repeated
+    def sort(self, *args, **kwargs):
+        super(DFShortcutList, self).sort(*args, **kwargs)
+        if self.__repeated:
+            self.__invalidate()
+        self.__entriesChanged()
+
+    def reverse(self):
+        super(DFShortcutList, self).reverse()
+        if self.__repeated:
+            self.__invalidate()
+        self.__entriesChanged()
+
+    # Every other modification discards the index
+    def __setitem__(self, index, value):
+        super(DFShortcutList, self).__setitem__(index, value)
+        self.__invalidate()
+        self.__entriesChanged()
+
+    def __delitem__(self, index):
+        super(DFShortcutList, self).__delitem__(index)
+        self.__invalidate()
+        self.__entriesChanged()
+
+    def __imul__(self, count):
+        super(DFShortcutList, self).__imul__(count)
+        self.__invalidate()
+        self.__entriesChanged()
+        return self
 
 ## CLASS_FROM_DICT
-#  Magic dictionary to namespace conversion
+#  Magic dictionary to namespace conversion. The dictionary is used directly as
+#  the object's __dict__, so that each value is an attribute of the object and
+#  is found by the normal attribute lookup - while subscripting and iteration
+#  are served by the same dictionary. Where the namespace is held by a node
+#  (its owner), setting or removing a value is reported to the node by calling
+#  its markDirty method.
 #
 class CLASS_FROM_DICT (object):
-    __raw_dict = None
 
-    def __init__ (self, val_dict):
-        self.__raw_dict = val_dict
+    # The owner is held in a slot, so that it is not one of the values
+    __slots__ = ('__dict__', '__owner')
+
+    def __init__ (self, val_dict, owner=None):
+        object.__setattr__(self, '__dict__', val_dict)
+        object.__setattr__(self, '_CLASS_FROM_DICT__owner', owner)
+
+    def __changed(self):
+        if self.__owner is not None:
+            self.__owner.markDirty()
+
+    def __setattr__(self, key, value):
+        object.__setattr__(self, key, value)
+        self.__changed()
+
+    def __delattr__(self, key):
+        object.__delattr__(self, key)
+        self.__changed()
 
+    # Values are restored directly when unpickling, without reporting them
+    def __getstate__(self):
+        return (self.__dict__, self.__owner)
+
+    def __setstate__(self, state):
+        object.__setattr__(self, '__dict__', state[0])
+        object.__setattr__(self, '_CLASS_FROM_DICT__owner', state[1])
+
+    # The methods are exposed as properties, as these take priority over any
+    # value with the same name held in the dictionary
+    @property
     def keys(self):
-        return self.__raw_dict.keys()
+        return self.__dict__.keys
 
+    @property
     def values(self):
-        return self.__raw_dict.values()
+        return self.__dict__.values
 
+    @property
     def dict(self):
-        return self.__raw_dict
+        return self.__rawDict
+
+    def __rawDict(self):
+        return self.__dict__
 
     def __repr__(self):
-        return self.__raw_dict.__repr__()
+        return self.__dict__.__repr__()
 
     # Override the [...] subscript accessor to access values
     def __getitem__(self, key):
-        if key in self.__dict__:
-            return self.__dict__[key]
-        elif key in self.__raw_dict:
-            return self.__raw_dict[key]
-        else:
-            return None
+        return self.__dict__.get(key)
 
     # Override the [...] subscript accessor to set values
     def __setitem__(self, key, value):
-        if key in self.__dict__:
-            self.__dict__[key] = value
-        else:
-            self.__raw_dict[key] = value
-
-    # Override the '.' attribute accessor to access values
-    def __getattribute__(self, key):
-        try:
-            result = super(CLASS_FROM_DICT, self).__getattribute__(key)
-            return result
-        except AttributeError as e:
-            if key in self.__raw_dict:
-                return self.__raw_dict[key]
-            else:
-                raise e
+        self.__dict__[key] = value
+        self.__changed()
 
-    # Override the '.' attribute accessor to set values
-    def __setattribute__(self, key, value):
-        if self.__raw_dict and key in self.__raw_dict.keys():
-            raise AttributeError("%s is a protected property" % key)
-        else:
-            self.__raw_dict[key] = value
+    # Test whether a key is present
+    def __contains__(self, key):
+        return key in self.__dict__
 
-    # Allow the object keys to be iterated
-    __last_index = 0
+    # Allow the object keys to be iterated, each call returning a new iterator
     def __iter__(self):
-        self.__last_index = 0
-        return self
+        return iter(self.__dict__)
 
-    def __next__(self):
-        item = None
-        if self.__last_index < len(self.keys()):
-            item = list(self.keys())[self.__last_index]
-            self.__last_index += 1
-        else:
-            raise StopIteration()
-        return item
-    next = __next__
-
-def convert_to_class (map_in):
+def convert_to_class (map_in, owner=None):
     digested = {}
     for key in map_in:
         if type(map_in[key]) is dict:
-            digested[key] = convert_to_class(map_in[key])
+            digested[key] = convert_to_class(map_in[key], owner)
         elif type(map_in[key]) is list:
-            digested[key] = [convert_to_class(x) for x in map_in[key]]
+            digested[key] = [convert_to_class(x, owner) for x in map_in[key]]
         else:
             digested[key] = map_in[key]
-    return CLASS_FROM_DICT(digested)
+    return CLASS_FROM_DICT(digested, owner)
 
 # ------------------------------------------------------------------------------
 # Helper functions
@@ -176,6 +525,67 @@ def msFromEpoch(date):
 def cleanID(the_str):
     return the_str.lower().strip()
 
+## internString
+#  Return the canonical copy of a string, so that values repeated across many
+#  objects (e.g. port names, interconnect types and directions) share a single
+#  instance in memory rather than one per object.
+#  @param value The value to intern (returned unchanged if not a string)
+#
+def internString(value):
+    return sys.intern(value) if type(value) is str else value
+
+## slotNames
+#  List the attribute names of every slot defined by a class and its bases,
+#  with the names of private slots mangled as they are stored.
+#  @param cls The class to inspect
+#
+def slotNames(cls):
+    names = []
+    for base in cls.__mro__:
+        slots = base.__dict__.get('__slots__', ())
+        for name in ([slots] if isinstance(slots, str) else slots):
+            if name in ('__dict__', '__weakref__'):
+                continue
+            if name.startswith('__') and not name.endswith('__'):
+                name = '_' + base.__name__.lstrip('_') + name
+            names.append(name)
+    return names
+
+## hashDump
+#  Calculate a stable hash of a dumped object (or of a list of other hashes),
+#  which is independent of the order that dictionary keys were inserted in.
+#  @param obj The dumped object to hash
+#  @returns The SHA-256 hash as a hexadecimal string
+#
+def hashDump(obj):
+    text = json.dumps(obj, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+## matchInclude
+#  Check a hierarchical block path against a list of include patterns, where
+#  each pattern is a hierarchical path whose sections may contain wildcards
+#  (e.g. 'top.subsys.dma*'). A block is kept if it is on or below a path that
+#  matches a pattern, or if it is an ancestor of such a path.
+#  @param path    The hierarchical path of the block
+#  @param include List of include patterns (None includes everything)
+#  @returns A tuple of whether to keep the block, and the patterns to apply to
+#           its children (None where the whole subtree is included)
+#
+def matchInclude(path, include):
+    if include == None:
+        return (True, None)
+    sections = path.split('.')
+    ancestor = False
+    for pattern in include:
+        pat_sections = pattern.split('.')
+        prefix       = all(
+            fnmatchcase(x, y) for x, y in zip(sections, pat_sections)
+        )
+        if prefix and len(pat_sections) <= len(sections):
+            return (True, None)
+        ancestor = ancestor or prefix
+    return (ancestor, include if ancestor else None)
+
 ## encapsulatedDump
 #  Dump out an object of any type, if it is not a primitive type then encapulate
 #  it within a dictionary that describes the type.
@@ -206,20 +616,12 @@ def encapsulatedDump(obj, project):
 #
 def encapsulatedLoad(dump, root):
     from designformat import DFConstants
-    from .project import subnode_types
+    from .project import resolveNodeType
     if isinstance(dump, dict):
         if DFConstants.ATTRIBUTES.TYPE in dump:
-            d_type = cleanID(dump[DFConstants.ATTRIBUTES.TYPE])
-            d_data = dump[DFConstants.ATTRIBUTES.DUMP]
             # Work out what type to reload this node as
-            node_type = None
-            for item in subnode_types:
-                if cleanID(item.__name__) == d_type:
-                    node_type = item
-                    break
-            if not node_type:
-                raise Exception("Unable to resolve node type " + node['type'])
-            return node_type().loadObject(d_data, root)
+            node_type = resolveNodeType(dump[DFConstants.ATTRIBUTES.TYPE])
+            return node_type().loadObject(dump[DFConstants.ATTRIBUTES.DUMP], root)
         else:
             loaded = {}
             for key in dump.keys():
@@ -24,7 +24,12 @@ from .constant_tie import DFConstantTie
 class DFConnection(DFBase):
     """ DesignFormat representation of an interconnection between two points """
 
-    def __init__(self, start_port=None, start_index=None, end_port=None, end_index=None):
+    __slots__ = ('start_port', 'start_index', 'end_port', 'end_index')
+
+    OWNERS = ('start_port', 'end_port')
+
+    def __init__(self, start_port=None, start_index=None, end_port=None, end_index=None,
+                 attach=True):
         """ Constructor of the connection
 
         Args:
@@ -32,6 +37,8 @@ class DFConnection(DFBase):
             start_index: Signal index within DFPort to connect
             end_port   : End point can only be a DFPort
             end_index  : Signal index within DFPort to connect
+            attach     : Whether to add the connection to the ports at each end
+                         (not done for the views of a DFConnectionTable)
         """
         if (start_port != None) and (end_port != None):
             # Create an identifier for this connection
@@ -47,9 +54,9 @@ class DFConnection(DFBase):
             self.end_port    = end_port
             self.end_index   = end_index if end_index != None else 0
 
-            if (self.start_port != None):
+            if (self.start_port != None) and attach:
                 self.start_port.addConnection(self)
-            if (self.end_port   != None):
+            if (self.end_port   != None) and attach:
                 self.end_port.addConnection(self)
 
             self.checkConnection()
@@ -107,12 +114,18 @@ class DFConnection(DFBase):
 
         return obj
 
-    def loadObject(self, obj, root):
+    def validate(self):
+        """ Check that the connection's signal indexes are in range """
+        self.checkConnection()
+        return self
+
+    def loadObject(self, obj, root, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate)
         """
         super(DFConnection, self).loadObject(obj, root)
 
@@ -125,12 +138,14 @@ class DFConnection(DFBase):
         end_path  = "%s[%s]" % (obj['end_port']['block'], obj['end_port']['port'])
         self.end_port = root.resolvePath(end_path)
 
-        self.start_port.addConnection(self)
-        self.end_port.addConnection(self)
-
+        # The indexes are set first, as ports map their connections by index
         self.start_index = int(obj['start_index']) if 'start_index' in obj else 0
         self.end_index   = int(obj['end_index']) if 'end_index' in obj else 0
 
-        self.checkConnection()
+        self.start_port.addConnection(self)
+        self.end_port.addConnection(self)
+
+        if not trusted:
+            self.checkConnection()
 
         return self
@@ -0,0 +1,458 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Columnar store for the connections held by a DFBlock (see
+# DFBlock.compactConnections), which replaces a DFConnection object per
+# connection with a row across four integer arrays:
+#
+#  - START_PORT, END_PORT: Index of the port at each end within the table's
+#    list of ports
+#  - START_INDEX, END_INDEX: Signal index within the port at each end
+#
+# DFConnection objects are only created when a row is accessed, as read-only
+# views (DFConnectionView) that are not registered with their ports - so each
+# access returns a new object, and a view is found in the table (or removed
+# from it) by matching the row it describes. Connections that can't be
+# represented by a row (tie-offs and those carrying attributes or a
+# description) are held as objects, alongside a row marking their position.
+# Queries by port are answered from an index that groups the rows by the port
+# at each end, this is built on first use and discarded as connections are
+# added. Removing a connection only marks its row as removed, so the index is
+# kept and removing a number of connections stays linear - the removed rows are
+# dropped together when rows are next accessed by position (see __compact).
+# Every modification is reported to the block holding the table (see
+# DFBase.markDirty).
+
+from array import array
+
+from .connection import DFConnection
+
+# Columns of the table
+START_PORT  = 0
+START_INDEX = 1
+END_PORT    = 2
+END_INDEX   = 3
+
+# Type code of the arrays holding each column
+TYPE_CODE = 'q'
+
+class DFConnectionView(DFConnection):
+    """
+    Connection constructed from a row of a DFConnectionTable, which is read-only
+    as modifications can't be stored back into the row. To modify a connection
+    held as a row, remove it from the table and add a replacement.
+    """
+
+    __slots__ = ('table', )
+
+    def __init__(self, table, start_port, start_index, end_port, end_index):
+        """ Construct a view of a row
+
+        Args:
+            table      : The DFConnectionTable holding the row
+            start_port : The port driving the connection
+            start_index: Signal index within the driver port
+            end_port   : The port being driven by the connection
+            end_index  : Signal index within the driven port
+        """
+        super(DFConnectionView, self).__init__(
+            start_port, start_index, end_port, end_index, attach=False
+        )
+        object.__setattr__(self, 'table', table)
+
+    def __isBound(self):
+        """ Check whether the view has been constructed and attached to its table """
+        try:
+            object.__getattribute__(self, 'table')
+        except AttributeError:
+            return False
+        return True
+
+    def __setattr__(self, key, value):
+        """ Reject changes to the properties of a constructed view
+
+        Args:
+            key  : The attribute being set
+            value: The value to set
+        """
+        if key[0] != '_' and self.__isBound():
+            raise Exception(
+                "Connection %s is held as a row of a DFConnectionTable and can't "
+                "be modified, remove it and add a replacement instead" % self.id
+            )
+        super(DFConnectionView, self).__setattr__(key, value)
+
+    def markDirty(self):
+        """ Reject changes to the attributes of a constructed view (see __setattr__) """
+        if self.__isBound():
+            raise Exception(
+                "Connection %s is held as a row of a DFConnectionTable and can't "
+                "be modified, remove it and add a replacement instead" % self.id
+            )
+
+class DFConnectionTable(object):
+    """
+    Columnar store of connections, which behaves as a list of DFConnection
+    objects - so it can be held as the 'connections' of a DFBlock.
+    """
+
+    def __init__(self, owner=None):
+        """ Construct an empty table
+
+        Args:
+            owner: The DFBlock holding the table, which is marked dirty whenever
+                   the table is modified
+        """
+        self.ports     = []
+        self.columns   = tuple(array(TYPE_CODE) for _ in range(4))
+        self.owner     = owner
+        self.__ids     = {}
+        self.__objects = {}
+        self.__dead    = set()
+        self.__index   = None
+
+    def __changed(self, added=True):
+        """ Report a modification to the holding block
+
+        Args:
+            added: Whether rows were added, which discards the index
+        """
+        if added:
+            self.__index = None
+        if self.owner is not None:
+            self.owner.markDirty()
+
+    def __compact(self):
+        """
+        Drop the rows marked as removed (see remove), so that every remaining
+        row is held at its position. This is done before any row is accessed by
+        position, and discards the index.
+        """
+        dead = self.__dead
+        if len(dead) == 0:
+            return
+        count = len(self.columns[START_PORT])
+        live  = count - len(dead)
+        if min(dead) >= live:
+            # Only the last rows were removed
+            for column in self.columns:
+                del column[live:]
+        else:
+            rows = [x for x in range(count) if x not in dead]
+            self.columns = tuple(
+                array(TYPE_CODE, [column[x] for x in rows]) for column in self.columns
+            )
+            moved = { x: y for y, x in enumerate(rows) }
+            self.__objects = { moved[x]: y for x, y in self.__objects.items() }
+        self.__dead  = set()
+        self.__index = None
+
+    def __portID(self, port):
+        """ Return the index of a port in the table, adding it if necessary
+
+        Args:
+            port: The port to lookup
+        """
+        port_id = self.__ids.get(port)
+        if port_id == None:
+            port_id = self.__ids[port] = len(self.ports)
+            self.ports.append(port)
+        return port_id
+
+    def addConnection(self, start_port, start_index, end_port, end_index):
+        """ Add a row connecting a signal of one port to a signal of another
+
+        Args:
+            start_port : The port driving the connection
+            start_index: Signal index within the driver port
+            end_port   : The port being driven by the connection
+            end_index  : Signal index within the driven port
+        """
+        for port, index in ((start_port, start_index), (end_port, end_index)):
+            if index < 0 or index >= port.count:
+                raise Exception(
+                    "Index %i is out of range for port count %i" % (index, port.count)
+                )
+        row = (
+            self.__portID(start_port), start_index, self.__portID(end_port), end_index
+        )
+        for column, value in zip(self.columns, row):
+            column.append(value)
+        self.__changed()
+
+    @staticmethod
+    def isColumnar(conn):
+        """ Check whether a DFConnection can be stored as a row
+
+        Args:
+            conn: The connection to check
+        """
+        return (
+            not conn.isTieOff() and not conn.hasAttributes() and
+            not conn.description
+        )
+
+    def append(self, conn, detach=True):
+        """
+        Add a DFConnection to the table. Connections between two ports without
+        attributes or a description are stored as a row and removed from the
+        connection lists of their ports (see DFPort.detachConnections), any
+        other connection is kept as it is.
+
+        Args:
+            conn  : The connection to add
+            detach: Whether to remove a connection stored as a row from its
+                    ports, otherwise the caller is responsible for doing so
+        """
+        if DFConnectionTable.isColumnar(conn):
+            self.addConnection(
+                conn.start_port, conn.start_index, conn.end_port, conn.end_index
+            )
+            if detach:
+                conn.start_port.detachConnections([conn])
+                conn.end_port.detachConnections([conn])
+        else:
+            self.__objects[len(self.columns[START_PORT])] = conn
+            row = (
+                self.__portID(conn.start_port), conn.start_index,
+                self.__portID(conn.end_port), conn.end_index
+            )
+            for column, value in zip(self.columns, row):
+                column.append(value)
+            self.__changed()
+
+    def extend(self, conns):
+        """ Add a number of DFConnections to the table (see append)
+
+        Args:
+            conns: The connections to add
+        """
+        for conn in conns:
+            self.append(conn)
+
+    def __len__(self):
+        return len(self.columns[START_PORT]) - len(self.__dead)
+
+    def __getitem__(self, row):
+        """ Return a DFConnection for a row (or a list of them for a slice)
+
+        Args:
+            row: The row (or slice of rows) to return
+        """
+        self.__compact()
+        if isinstance(row, slice):
+            return [self[x] for x in range(*row.indices(len(self)))]
+        row = range(len(self))[row]
+        if row in self.__objects:
+            return self.__objects[row]
+        return DFConnectionView(
+            self,
+            self.ports[self.columns[START_PORT][row]], self.columns[START_INDEX][row],
+            self.ports[self.columns[END_PORT][row]], self.columns[END_INDEX][row]
+        )
+
+    def __iter__(self):
+        self.__compact()
+        for row in range(len(self)):
+            yield self[row]
+
+    def __findRow(self, conn):
+        """
+        Return the row holding a connection, or None if it isn't held. A view is
+        matched to the first row connecting the same signals, any other
+        connection must be held by the table as an object. Rows marked as
+        removed are skipped, so the row may not yet be held at its position.
+
+        Args:
+            conn: The connection to look for
+        """
+        if isinstance(conn, DFConnectionView) and conn.table is self:
+            end_port = self.__ids.get(conn.end_port)
+            ports, indexes = self.columns[END_PORT], self.columns[END_INDEX]
+            for row in self.__findRows(START_PORT, conn.start_port, conn.start_index):
+                if ports[row] == end_port and indexes[row] == conn.end_index:
+                    return row
+            return None
+        for row, obj in self.__objects.items():
+            if obj is conn:
+                return row
+        return None
+
+    def __contains__(self, conn):
+        return self.__findRow(conn) != None
+
+    def index(self, conn):
+        """ Return the row holding a connection (see __findRow)
+
+        Args:
+            conn: The connection to look for
+        """
+        self.__compact()
+        row = self.__findRow(conn)
+        if row == None:
+            raise ValueError("Connection is not held in the table")
+        return row
+
+    def __removeRows(self, rows):
+        """ Mark a number of rows as removed (see __compact)
+
+        Args:
+            rows: The rows to remove
+        """
+        for row in rows:
+            self.__dead.add(row)
+            self.__objects.pop(row, None)
+        self.__changed(added=False)
+
+    def remove(self, conn):
+        """
+        Remove a connection from the table, as for a list the connection is not
+        detached from its ports. The row is only marked as removed, so removing
+        a number of connections in turn doesn't move the rows after each one.
+
+        Args:
+            conn: The connection (or a view of the row) to remove
+        """
+        row = self.__findRow(conn)
+        if row == None:
+            raise ValueError("Connection is not held in the table")
+        self.__removeRows([row])
+
+    def pop(self, row=-1):
+        """ Remove and return the connection held in a row
+
+        Args:
+            row: The row to remove (default: the last row)
+        """
+        conn = self[row]
+        del self[row]
+        return conn
+
+    def __delitem__(self, row):
+        """ Remove the connection held in a row (or the rows of a slice)
+
+        Args:
+            row: The row (or slice of rows) to remove
+        """
+        self.__compact()
+        if isinstance(row, slice):
+            self.__removeRows(range(len(self))[row])
+        else:
+            self.__removeRows([range(len(self))[row]])
+
+    def clear(self):
+        """ Remove every connection from the table """
+        self.ports     = []
+        self.columns   = tuple(array(TYPE_CODE) for _ in range(4))
+        self.__ids     = {}
+        self.__objects = {}
+        self.__dead    = set()
+        self.__changed()
+
+    def __buildIndex(self, column):
+        """
+        Group the rows by the port held in a column, returning the rows in order
+        of port along with the offset of each port's rows.
+
+        Args:
+            column: The column holding the port (START_PORT or END_PORT)
+        """
+        keys   = self.columns[column]
+        order  = sorted(range(len(keys)), key=keys.__getitem__)
+        counts = [0] * len(self.ports)
+        for key in keys:
+            counts[key] += 1
+        offsets = array(TYPE_CODE, [0])
+        for count in counts:
+            offsets.append(offsets[-1] + count)
+        return (array(TYPE_CODE, order), offsets)
+
+    def __findRows(self, column, port, index=None):
+        """
+        Return the rows with a given port (and signal index) in one column,
+        skipping those marked as removed.
+
+        Args:
+            column: The column holding the port (START_PORT or END_PORT)
+            port  : The port to look for
+            index : The signal index within the port (None for all signals)
+        """
+        port_id = self.__ids.get(port)
+        if port_id == None or len(self.columns[START_PORT]) == 0:
+            return []
+        if self.__index == None:
+            self.__index = {}
+        if column not in self.__index:
+            self.__index[column] = self.__buildIndex(column)
+        order, offsets = self.__index[column]
+        rows = order[offsets[port_id]:offsets[port_id+1]]
+        # Connections held as objects are found through their ports instead
+        if self.__objects or self.__dead:
+            rows = [
+                x for x in rows if x not in self.__objects and x not in self.__dead
+            ]
+        if index == None:
+            return list(rows)
+        indexes = self.columns[column + 1]
+        return [x for x in rows if indexes[x] == index]
+
+    def getOutbound(self, port, index=None):
+        """ Return the rows of connections driven by a port
+
+        Args:
+            port : The driving port
+            index: Only return the rows driven by this signal index
+        """
+        self.__compact()
+        return self.__findRows(START_PORT, port, index)
+
+    def getInbound(self, port, index=None):
+        """ Return the rows of connections driving a port
+
+        Args:
+            port : The driven port
+            index: Only return the rows driving this signal index
+        """
+        self.__compact()
+        return self.__findRows(END_PORT, port, index)
+
+    def fanout(self, port, index):
+        """ Return the (port, signal index) pairs driven by a signal of a port
+
+        Args:
+            port : The driving port
+            index: The signal index within the port
+        """
+        ports, column, indexes = self.ports, self.columns[END_PORT], self.columns[END_INDEX]
+        return [(ports[column[x]], indexes[x]) for x in self.__findRows(START_PORT, port, index)]
+
+    def fanin(self, port, index):
+        """ Return the (port, signal index) pairs driving a signal of a port
+
+        Args:
+            port : The driven port
+            index: The signal index within the port
+        """
+        ports, column, indexes = self.ports, self.columns[START_PORT], self.columns[START_INDEX]
+        return [(ports[column[x]], indexes[x]) for x in self.__findRows(END_PORT, port, index)]
+
+    def __getstate__(self):
+        """ Leave the index out of pickled tables, it is rebuilt on first use """
+        state = self.__dict__.copy()
+        state['_DFConnectionTable__index'] = None
+        return state
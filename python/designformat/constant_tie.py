@@ -21,6 +21,8 @@ from .base import DFBase
 class DFConstantTie(DFBase):
     """ DesignFormat representation of a tie to a constant value """
 
+    OWNERS = ('block',)
+
     def __init__(self, value="", reset=False, block=None):
         """ Constructor for the constant tie value
 
@@ -71,12 +73,13 @@ class DFConstantTie(DFBase):
 
         return obj
 
-    def loadObject(self, obj, root):
+    def loadObject(self, obj, root, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Accepted for consistency, a tie has nothing to validate
         """
         super(DFConstantTie, self).loadObject(obj, root)
 
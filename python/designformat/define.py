@@ -21,17 +21,22 @@ from .base import DFBase
 class DFDefine(DFBase):
     """ Defines a named constant value related to the design. """
 
-    def __init__(self, id=None, value=None, description=None):
+    OWNERS = ('owner',)
+
+    def __init__(self, id=None, value=None, description=None, owner=None):
         """ Constructor for the defined value.
 
         Args:
             id         : Name of the constant
             value      : Value of the constant (can be integer, or otherwise)
             description: Human-readable description of the definition
+            owner      : The node holding this value as one of its enumerated
+                         values (e.g. a DFCommandField), if any
         """
         super(DFDefine, self).__init__(id, description)
 
         self.value = value
+        self.owner = owner
 
     def dumpObject(self, project=None):
         """ Dump out this node so that it can be reloaded
@@ -48,12 +53,13 @@ class DFDefine(DFBase):
         # Return the object
         return obj
 
-    def loadObject(self, obj, root=None):
+    def loadObject(self, obj, root=None, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Accepted for consistency, a define has nothing to validate
         """
         super(DFDefine, self).loadObject(obj, root)
 
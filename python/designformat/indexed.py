@@ -0,0 +1,190 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Random-access container for a dumped DFProject. Every node attached to the
+# project is stored as a separate binary encoded segment (see binary.py), and a
+# table at the end of the file records the offset of each segment along with
+# the node's type, ID and base properties. This allows the file to be memory
+# mapped and a single node to be decoded without reading the rest of the file.
+#
+# Layout:
+#
+#  - HEADER: MAGIC, followed by the offset and length of the index table as
+#    little-endian 64-bit integers
+#  - One binary encoded segment per node, each holding the encapsulated node
+#    exactly as it appears in the 'nodes' list of the dumped project
+#  - The index table, binary encoded, containing the project's properties and
+#    an entry for every node
+
+import mmap
+import struct
+
+from designformat import DFConstants
+
+from .base import DFBase
+from .binary import encodeBinary, decodeBinary
+from .common import cleanID
+
+MAGIC  = b"DFIDX\x01"
+HEADER = struct.Struct("<%isQQ" % len(MAGIC))
+
+# Properties of each node that are copied into its index entry
+SUMMARY_KEYS = ('id', 'description', 'attributes')
+
+def isIndexed(data):
+    """ Check whether a buffer starts with the indexed container's magic marker
+
+    Args:
+        data: The bytes to check
+    """
+    return data[:len(MAGIC)] == MAGIC
+
+def encodeIndexed(obj):
+    """ Encode a dumped DFProject into an indexed container
+
+    Args:
+        obj: The dumped project, as produced by DFProject.dumpObject
+
+    Returns:
+        bytes: The encoded container
+    """
+    segments = []
+    entries  = []
+    offset   = HEADER.size
+    for node in obj['nodes'] if 'nodes' in obj else []:
+        dump    = node[DFConstants.ATTRIBUTES.DUMP]
+        attrs   = dump['attributes'] if 'attributes' in dump else {}
+        segment = encodeBinary(node)
+        entries.append({
+            'type'     : cleanID(node[DFConstants.ATTRIBUTES.TYPE]),
+            'id'       : dump['id'],
+            'principal': bool(attrs.get(DFConstants.ATTRIBUTES.PRINCIPAL)),
+            'summary'  : { x: dump[x] for x in SUMMARY_KEYS if x in dump },
+            'offset'   : offset,
+            'length'   : len(segment),
+        })
+        segments.append(segment)
+        offset += len(segment)
+    index = encodeBinary({
+        'project': { x: obj[x] for x in obj if x != 'nodes' },
+        'nodes'  : ('nodes' in obj),
+        'entries': entries,
+    })
+    return HEADER.pack(MAGIC, offset, len(index)) + b"".join(segments) + index
+
+class DFIndexedBlob(object):
+    """
+    Reader for the indexed container, the file is memory mapped and only the
+    index table is decoded up-front. Individual nodes can then be decoded or
+    loaded on demand, or a DFProject can be constructed holding any subset of
+    the nodes.
+    """
+
+    def __init__(self, path):
+        """ Open an indexed container
+
+        Args:
+            path: Path to the file to open
+        """
+        self.__fh  = open(path, 'rb')
+        self.__map = mmap.mmap(self.__fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise Exception("File is not an indexed DesignFormat blob: " + path)
+        index        = decodeBinary(self.__map[offset:offset+length])
+        self.project = index['project']
+        self.entries = index['entries']
+        self.__nodes = index['nodes']
+
+    def close(self):
+        """ Release the memory map and the underlying file """
+        self.__map.close()
+        self.__fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def findEntries(self, desired=None, principal=None):
+        """
+        Return the index entries of nodes in the container, optionally filtering
+        for specific types of node and whether they are principal.
+
+        Args:
+            desired  : Node class (or list of classes) to filter for
+            principal: If True only principal nodes are returned, if False only
+                       reference nodes
+        """
+        entries = self.entries
+        if desired != None:
+            desired = desired if isinstance(desired, list) else [desired]
+            names   = [cleanID(x.__name__) for x in desired]
+            entries = [x for x in entries if x['type'] in names]
+        if principal != None:
+            entries = [x for x in entries if x['principal'] == principal]
+        return entries
+
+    def readNode(self, entry):
+        """ Decode the encapsulated dump of a single node
+
+        Args:
+            entry: The index entry of the node
+        """
+        return decodeBinary(self.__map[entry['offset']:entry['offset']+entry['length']])
+
+    def readObject(self, entries=None):
+        """
+        Decode the dumped project, containing either all of the nodes or just a
+        subset of them, in the form that DFProject.loadObject accepts.
+
+        Args:
+            entries: Index entries of the nodes to include (defaults to all)
+        """
+        obj = dict(self.project)
+        if self.__nodes or entries != None:
+            obj['nodes'] = [
+                self.readNode(x) for x in (entries if entries != None else self.entries)
+            ]
+        return obj
+
+    def loadProject(self, entries=None, lazy=False, trusted=False):
+        """ Construct a DFProject holding all of the nodes, or just a subset
+
+        Args:
+            entries: Index entries of the nodes to include (defaults to all)
+            lazy   : Defer constructing the contents of blocks below each root
+                     DFBlock until they are first accessed
+            trusted: Skip validation of the loaded values
+        """
+        from .project import DFProject
+        return DFProject().loadObject(self.readObject(entries), lazy, trusted)
+
+    def loadSummary(self, entry):
+        """
+        Construct an instance of a node with only its base properties (ID,
+        description and attributes) populated from the index table - this is
+        enough to inspect attributes without decoding the node itself.
+
+        Args:
+            entry: The index entry of the node
+        """
+        from .project import resolveNodeType
+        return DFBase.loadObject(resolveNodeType(entry['type'])(), entry['summary'], None)
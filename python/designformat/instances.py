@@ -0,0 +1,220 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Deduplicated form of a dumped DFProject, where blocks with identical contents
+# (e.g. every instance of the same module type) are stored just once. The dump
+# of each child block is made relative to its position in the tree, by replacing
+# its own hierarchical path, its ID and the path of its parent with markers (see
+# PATH, NAME and PARENT) - wherever these appear in the hierarchical paths and
+# IDs that it holds. Identical relative dumps are stored once in a list of
+# definitions, and each block is replaced by an instance record of the form:
+#
+#   { "id": <ID of the block>, "definition": <index into the definitions> }
+#
+# The children of a definition are themselves instance records, so a repeated
+# structure is shared at every level of the hierarchy. Expanding a definition
+# for an instance substitutes the markers back, which reproduces the original
+# dump of the block exactly - so decodeInstances(encodeInstances(obj)) == obj.
+#
+# Blocks whose contents are not repeated elsewhere are left in place rather than
+# recorded, as are blocks whose dumps already contain the markers (or their
+# escaped forms) and the root blocks of the project.
+
+import hashlib
+import json
+import re
+
+from designformat import DFConstants
+
+from .binary import PATH_KEYS
+from .common import cleanID
+
+# Markers substituted for the instance's path, ID and parent path
+PATH   = "\x00"
+NAME   = "\x01"
+PARENT = "\x02"
+
+# Strings containing these can't be made relative, as markers within them
+# would be confused with the substituted ones when a definition is expanded
+UNSAFE = re.compile(r'[\x00-\x02]|\\u000[0-2]')
+
+def hasInstances(obj):
+    """ Check whether a dumped DFProject has been deduplicated
+
+    Args:
+        obj: The dumped project
+    """
+    return 'definitions' in obj
+
+def encodeInstances(obj):
+    """
+    Deduplicate a dumped DFProject, replacing every child block whose contents
+    are repeated by an instance of a shared definition. The dump passed in is
+    not modified.
+
+    Args:
+        obj: The dumped project, as produced by DFProject.dumpObject
+
+    Returns:
+        dict: The deduplicated dump, holding the definitions ahead of the nodes
+    """
+    definitions = []
+    lookup      = {}
+    instances   = []
+
+    def relativise(value, key, path, parent, name_re):
+        if isinstance(value, dict):
+            rel = {}
+            for sub_key, item in value.items():
+                if UNSAFE.search(sub_key):
+                    raise ValueError(sub_key)
+                rel[sub_key] = relativise(item, sub_key, path, parent, name_re)
+            return rel
+        elif isinstance(value, list):
+            return [relativise(x, key, path, parent, name_re) for x in value]
+        elif not isinstance(value, str):
+            return value
+        elif UNSAFE.search(value):
+            raise ValueError(value)
+        elif key in PATH_KEYS:
+            if value == path or value.startswith(path + '.'):
+                return PATH + value[len(path):]
+            elif value == parent:
+                return PARENT
+        elif key == 'id':
+            return name_re.sub(NAME, value.replace(path, PATH))
+        return value
+
+    def encode(block, parent):
+        out = dict(block)
+        if 'children' in block:
+            out['children'] = [encode(x, block['path']) for x in block['children']]
+        # Only children sitting where their paths say they are can be recorded
+        path = out.get('path')
+        if parent == None or out.get('parent') != parent or path != parent + '.' + out['id']:
+            return out
+        # The ID appears at the start of the IDs of ports and constant ties
+        name_re = re.compile(r'(?<![\w.])' + re.escape(out['id']) + r'(?=[\[\-])')
+        try:
+            rel = relativise(out, None, path, parent, name_re)
+        except ValueError:
+            return out
+        rel['id'] = NAME
+        digest = hashlib.sha256(json.dumps(rel).encode('utf-8')).digest()
+        index  = lookup.get(digest)
+        if index == None:
+            index = lookup[digest] = len(definitions)
+            definitions.append(rel)
+        record = { 'id': out['id'], 'definition': index }
+        instances.append((record, out))
+        return record
+
+    def renumber(block):
+        for child in block.get('children', []):
+            if 'definition' in child:
+                child['definition'] = remap[child['definition']]
+            else:
+                renumber(child)
+
+    nodes = [
+        {
+            DFConstants.ATTRIBUTES.TYPE: node[DFConstants.ATTRIBUTES.TYPE],
+            DFConstants.ATTRIBUTES.DUMP: encode(node[DFConstants.ATTRIBUTES.DUMP], None)
+        }
+        if cleanID(node[DFConstants.ATTRIBUTES.TYPE]) == 'dfblock' else node
+        for node in obj.get('nodes', [])
+    ]
+
+    # Definitions used by just one instance are put back in place of their
+    # record and the rest are renumbered - a block within a repeated definition
+    # is itself repeated, so every record held by a kept definition remains
+    uses = [0] * len(definitions)
+    for record, _ in instances:
+        uses[record['definition']] += 1
+    remap = {}
+    for index, count in enumerate(uses):
+        if count > 1:
+            remap[index] = len(remap)
+    for record, out in instances:
+        if record['definition'] in remap:
+            record['definition'] = remap[record['definition']]
+        else:
+            record.clear()
+            record.update(out)
+    definitions = [definitions[x] for x in remap]
+    for definition in definitions:
+        renumber(definition)
+
+    result = {}
+    for key, value in obj.items():
+        if key == 'nodes':
+            result['definitions'] = definitions
+            result['nodes'] = nodes
+        else:
+            result[key] = value
+    return result
+
+def decodeInstances(obj):
+    """
+    Expand a deduplicated DFProject dump back into its full form, as returned
+    by DFProject.dumpObject. The dump passed in is not modified.
+
+    Args:
+        obj: The deduplicated project, as produced by encodeInstances
+
+    Returns:
+        dict: The expanded dump
+    """
+    # Each definition is expanded by substituting into its serialised form, so
+    # that the copy for every instance is constructed by the JSON decoder
+    templates = [json.dumps(x) for x in obj['definitions']]
+
+    def escape(value):
+        return json.dumps(value)[1:-1]
+
+    def expand(block, parent):
+        if 'definition' in block:
+            path  = parent + '.' + block['id']
+            block = json.loads(
+                templates[block['definition']]
+                .replace('\\u0000', escape(path))
+                .replace('\\u0001', escape(block['id']))
+                .replace('\\u0002', escape(parent))
+            )
+        else:
+            block = dict(block)
+        if 'children' in block:
+            block['children'] = [expand(x, block['path']) for x in block['children']]
+        return block
+
+    result = {}
+    for key, value in obj.items():
+        if key == 'definitions':
+            continue
+        elif key == 'nodes':
+            result['nodes'] = [
+                {
+                    DFConstants.ATTRIBUTES.TYPE: node[DFConstants.ATTRIBUTES.TYPE],
+                    DFConstants.ATTRIBUTES.DUMP: expand(node[DFConstants.ATTRIBUTES.DUMP], None)
+                }
+                if cleanID(node[DFConstants.ATTRIBUTES.TYPE]) == 'dfblock' else node
+                for node in value
+            ]
+        else:
+            result[key] = value
+    return result
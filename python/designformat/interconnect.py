@@ -20,12 +20,15 @@ from .base import DFBase
 
 from designformat import DFConstants
 
-from .common import convert_to_class
+from .common import DFNodeList, convert_to_class
 from .define import DFDefine
 
 class DFInterconnect(DFBase):
     """ DesignFormat representation of a type of interconnection """
 
+    # Cached content hash, discarded when the interconnect is marked dirty
+    __hash = None
+
     def __init__(self, id=None, role=None, description="", project=None):
         """ Constructor for the interconnect type
 
@@ -40,7 +43,7 @@ class DFInterconnect(DFBase):
         self.role    = role if role != None else DFConstants.ROLE.MASTER
         self.project = project
 
-        self.components  = [] # Constituent components of the interconnect
+        self.components  = DFNodeList(owner=self) # Constituent components
 
         # Sanity check
         self.checkRole()
@@ -95,8 +98,10 @@ class DFInterconnect(DFBase):
         """
         if not isinstance(comp, DFInterconnectComponent):
             raise Exception("Component is not of type DFInterconnectComponent")
-        comp.project = self.project
+        comp.project      = self.project
+        comp.interconnect = self
         self.components.append(comp)
+        self.markDirty()
 
     def getMasterComponents(self):
         """ Returns a list of only the components with a master role """
@@ -166,6 +171,16 @@ class DFInterconnect(DFBase):
         else:
             raise KeyError("Unknown role when calling getRoleWidth: " + role)
 
+    def contentHash(self, cached=True):
+        """ Return the hash of the interconnect and its components (see DFBase) """
+        if self.__hash == None or not cached:
+            self.__hash = super(DFInterconnect, self).contentHash(cached)
+        return self.__hash
+
+    def discardCache(self):
+        """ Discard the cached hash (see DFBase.markDirty) """
+        self.__hash = None
+
     def dumpObject(self, project):
         """ Dump out this node so that it can be reloaded
 
@@ -183,12 +198,20 @@ class DFInterconnect(DFBase):
 
         return obj
 
-    def loadObject(self, obj, project):
+    def validate(self):
+        """ Check the role of the interconnect and each of its components """
+        self.checkRole()
+        for comp in self.components:
+            comp.validate()
+        return self
+
+    def loadObject(self, obj, project, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate)
         """
         super(DFInterconnect, self).loadObject(obj, project)
 
@@ -197,11 +220,12 @@ class DFInterconnect(DFBase):
         self.project = project
 
         # Sanity checks
-        self.checkRole()
+        if not trusted:
+            self.checkRole()
 
         # Reload each component
         for comp in obj['components']:
-            new_comp = DFInterconnectComponent().loadObject(comp, project)
+            new_comp = DFInterconnectComponent().loadObject(comp, project, trusted)
             self.addComponent(new_comp)
 
         return self
@@ -211,6 +235,8 @@ class DFInterconnectComponent(DFBase):
     DesignFormat representation for a component within a type of interconnection
     """
 
+    OWNERS = ('interconnect',)
+
     def __init__(
         self, id=None, role=None, description="", type=None, width_or_ref=None,
         count=1, default=0, enum=None, project=None
@@ -240,6 +266,9 @@ class DFInterconnectComponent(DFBase):
         self.count   = count if count != None else 1
         self.project = project
 
+        # The DFInterconnect holding this component
+        self.interconnect = None
+
         if self.type == DFConstants.COMPONENT.SIMPLE:
             self.width   = width_or_ref if width_or_ref != None else 0
             self.default = default if default else 0
@@ -250,7 +279,7 @@ class DFInterconnectComponent(DFBase):
         if isinstance(self.ref, DFInterconnect):
             self.ref = self.ref.id
 
-        self.enum = convert_to_class(enum if isinstance(enum, dict) else {})
+        self.enum = convert_to_class(enum if isinstance(enum, dict) else {}, self)
 
         # Sanity checks
         self.checkRole()
@@ -380,7 +409,7 @@ class DFInterconnectComponent(DFBase):
             value      : Value to name
             description: Human-readable description of the value
         """
-        self.enum[key] = DFDefine(key, int(value), description)
+        self.enum[key] = DFDefine(key, int(value), description, self)
 
     def dumpObject(self, project):
         """ Dump out this node so that it can be reloaded
@@ -410,12 +439,19 @@ class DFInterconnectComponent(DFBase):
 
         return obj
 
-    def loadObject(self, obj, project):
+    def validate(self):
+        """ Check the role and type of the component """
+        self.checkRole()
+        self.checkType()
+        return self
+
+    def loadObject(self, obj, project, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj : Description of this node
-            root: Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate)
         """
         super(DFInterconnectComponent, self).loadObject(obj, project)
 
@@ -428,14 +464,15 @@ class DFInterconnectComponent(DFBase):
         self.ref     = obj['ref'] if 'ref' in obj else None
 
         # Reload enumerated values
-        self.enum    = convert_to_class({})
+        self.enum    = convert_to_class({}, self)
         if 'enum' in obj:
             for key in obj['enum']:
-                self.enum[key] = DFDefine().loadObject(obj['enum'][key], project)
+                self.enum[key] = DFDefine(owner=self).loadObject(obj['enum'][key], project)
 
         # Perform a sanity check
-        self.checkRole()
-        self.checkType()
+        if not trusted:
+            self.checkRole()
+            self.checkType()
 
         # For chaining
         return self
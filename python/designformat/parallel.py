@@ -0,0 +1,65 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Process pools used to dump the top-level subtrees of a design in parallel
+# (see DFBlock.dumpObject). The blocks are shared with the workers by forking -
+# so each worker already holds the design and only the dumps are sent back.
+# Where the 'fork' start method isn't available, the dump is performed serially.
+#
+# Loading is not parallelised, as the constructed subtrees would have to be sent
+# back and rebuilt (or unpickled) in the parent - which costs more than loading
+# them there in the first place.
+
+import contextlib
+import multiprocessing
+
+# Objects shared with forked workers, set while the pool is created
+_shared = None
+
+@contextlib.contextmanager
+def openPool(workers, shared=None):
+    """
+    Context manager providing a pool of worker processes, or None if the work
+    should be performed serially instead.
+
+    Args:
+        workers: Number of worker processes (None or less than 2 for serial)
+        shared : Objects to share with the workers via fork (see dumpShared),
+                 if provided and fork is unavailable then no pool is created
+    """
+    global _shared
+    methods = multiprocessing.get_all_start_methods()
+    if workers == None or workers < 2 or (shared != None and 'fork' not in methods):
+        yield None
+        return
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    _shared = shared
+    try:
+        with context.Pool(workers) as pool:
+            yield pool
+    finally:
+        _shared = None
+
+def dumpShared(index):
+    """ Dump one of the blocks shared with the pool
+
+    Args:
+        index: Index of the block within the shared list of (blocks, project)
+    """
+    blocks, project = _shared
+    return blocks[index].dumpObject(project)
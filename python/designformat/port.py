@@ -19,11 +19,21 @@
 from designformat import DFConstants
 
 from .base import DFBase
+from .common import internString
 from .connection import DFConnection
+from .connection_table import DFConnectionTable
 
 class DFPort(DFBase):
     """ DesignFormat representation of a port (input, output or inout) """
 
+    __slots__ = (
+        'name', 'type', 'count', 'direction', 'block', 'connections', '__path',
+        '__maps'
+    )
+
+    OWNERS  = ('block',)
+    INDEXED = True
+
     def __init__(self, name="", type=None, count=0, direction=None, block=None, description=None):
         """ Constructor for a port object.
 
@@ -39,17 +49,29 @@ class DFPort(DFBase):
         id = block.id + "[" + name + "]" if (block != None) else name
         super(DFPort, self).__init__(id, description)
 
-        self.name      = name
-        self.type      = type
+        self.name      = internString(name)
+        self.type      = internString(type)
         self.count     = count
-        self.direction = direction
+        self.direction = internString(direction)
         self.block     = block
 
         self.connections = []
 
+        # Cached hierarchical path, with the block path it was derived from
+        self.__path = None
+
+        # Outbound and inbound connections keyed by signal index, built when
+        # first queried and then kept up to date by addConnection
+        self.__maps = None
+
         if not None in [name, type, count, direction, block]:
             self.check()
 
+    def validate(self):
+        """ Check that the port's properties are sensible """
+        self.check()
+        return self
+
     def getInterconnectType(self):
         """ Returns the DFInterconnect that this connection represents """
         project = self.block.getProject()
@@ -58,13 +80,28 @@ class DFPort(DFBase):
         else:
             return None
 
+    def __setattr__(self, key, value):
+        """ Drop the cached hierarchical path when the name or block changes
+
+        Args:
+            key  : The attribute being set
+            value: The value to set
+        """
+        if key == 'name' or key == 'block':
+            self.__path = None
+        super(DFPort, self).__setattr__(key, value)
+
     def hierarchicalPath(self):
         """
         Returns a complete hierarchical path from the DFProject's root node all
-        the way down to this port.
+        the way down to this port. The path is cached against the path of the
+        block, which is itself cached until any block is renamed or moved.
         """
-        path = self.block.hierarchicalPath() + '[' + self.name + ']'
-        return path
+        block_path = self.block.hierarchicalPath()
+        cached     = self.__path
+        if cached == None or cached[0] is not block_path:
+            cached = self.__path = (block_path, block_path + '[' + self.name + ']')
+        return cached[1]
 
     def check(self):
         """ Sanity check that the direction is allowed """
@@ -82,14 +119,111 @@ class DFPort(DFBase):
         if not isinstance(conn, DFConnection):
             raise Exception("Connection not of type DFConnection")
         self.connections.append(conn)
+        if self.__maps != None:
+            self.__mapConnection(conn)
+
+    def __mapConnection(self, conn):
+        """ Add a connection to the maps of connections by signal index
+
+        Args:
+            conn: The connection
+        """
+        outbound, inbound = self.__maps
+        if conn.start_port is self:
+            outbound.setdefault(conn.start_index, []).append(conn)
+        if conn.end_port is self:
+            inbound.setdefault(conn.end_index, []).append(conn)
+
+    def detachConnections(self, conns):
+        """
+        Remove connections from this port's list, used once they are held by a
+        DFConnectionTable - which is queried for them instead.
+
+        Args:
+            conns: The connections to remove
+        """
+        drop = set(id(x) for x in conns)
+        self.connections[:] = [x for x in self.connections if id(x) not in drop]
+        self.__maps = None
+
+    def __getTables(self):
+        """
+        Return the connection tables that may hold connections of this port,
+        these belong to either the port's block or the block above it.
+        """
+        tables = []
+        if self.block != None:
+            for block in (self.block, self.block.parent):
+                conns = getattr(block, 'connections', None)
+                if isinstance(conns, DFConnectionTable):
+                    tables.append(conns)
+        return tables
+
+    def __getConnectionMaps(self):
+        """ Return the outbound and inbound connections keyed by signal index """
+        self.materialiseConnections()
+        if self.__maps == None:
+            self.__maps = ({}, {})
+            for conn in self.connections:
+                self.__mapConnection(conn)
+        return self.__maps
+
+    def getOutboundConnections(self, index=None):
+        """ Return just the outbound connections (where we are the driver)
+
+        Args:
+            index: Only return the connections from this signal index (default:
+                   return the connections from all signals)
+        """
+        if index != None:
+            conns = list(self.__getConnectionMaps()[0].get(index, ()))
+        else:
+            self.materialiseConnections()
+            conns = [x for x in self.connections if x.start_port == self]
+        for table in self.__getTables():
+            conns += [table[x] for x in table.getOutbound(self, index)]
+        return conns
+
+    def getInboundConnections(self, index=None):
+        """ Return just the inbound connections (where we are being driven)
+
+        Args:
+            index: Only return the connections to this signal index (default:
+                   return the connections to all signals)
+        """
+        if index != None:
+            conns = list(self.__getConnectionMaps()[1].get(index, ()))
+        else:
+            self.materialiseConnections()
+            conns = [x for x in self.connections if x.end_port == self]
+        for table in self.__getTables():
+            conns += [table[x] for x in table.getInbound(self, index)]
+        return conns
 
-    def getOutboundConnections(self):
-        """ Return just the outbound connections (where we are the driver) """
-        return [x for x in self.connections if x.start_port == self]
+    def getFanout(self, index=0):
+        """
+        Return the (port, signal index) pairs driven by one signal of this port,
+        read directly from any DFConnectionTable without constructing views.
 
-    def getInboundConnections(self):
-        """ Return just the inbound connections (where we are being driven) """
-        return [x for x in self.connections if x.end_port == self]
+        Args:
+            index: The signal index within the port
+        """
+        signals = [
+            (x.end_port, x.end_index) for x in self.__getConnectionMaps()[0].get(index, ())
+        ]
+        for table in self.__getTables():
+            signals += table.fanout(self, index)
+        return signals
+
+    def materialiseConnections(self):
+        """
+        If the parent block was loaded lazily, make sure that its connections
+        have been constructed so that this port's connection list is complete.
+        Connections from outside the block are held by its parent, which will
+        always have been materialised already.
+        """
+        if self.block != None and not self.block.isMaterialised():
+            self.block.materialise()
 
     def getReceiverPorts(self):
         """ Return a list of ports that are driven by this port """
@@ -115,12 +249,10 @@ class DFPort(DFBase):
         # If I'm an input to a leaf node, then return the path to this point
         if self in self.block.ports.input and self.block.getAttribute(DFConstants.ATTRIBUTES.LEAF_NODE):
             return [path]
-        # Get all of my outbound connections for the right index
-        outbound = [x for x in self.getOutboundConnections() if x.start_index == index]
-        # For each outbound connection, recursively chase the connection
+        # For each signal driven by the right index, recursively chase the connection
         destinations = []
-        for conn in outbound:
-            destinations += conn.end_port.chaseConnection(conn.end_index, path)
+        for end_port, end_index in self.getFanout(index):
+            destinations += end_port.chaseConnection(end_index, path)
         # Return all of the destinations I found
         return destinations
 
@@ -278,22 +410,24 @@ class DFPort(DFBase):
 
         return obj
 
-    def loadObject(self, obj, root):
+    def loadObject(self, obj, root, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate)
         """
         super(DFPort, self).loadObject(obj, root)
 
-        self.name      = obj['name']
-        self.type      = obj['type']
+        self.name      = internString(obj['name'])
+        self.type      = internString(obj['type'])
         self.count     = int(obj['count'])
-        self.direction = obj['direction']
+        self.direction = internString(obj['direction'])
         if 'block' in obj:
             self.block = root.resolvePath(obj['block'])
 
-        self.check()
+        if not trusted:
+            self.check()
 
         return self
@@ -17,22 +17,30 @@
 #
 
 from datetime import datetime
+import json
 import re
 
 from designformat import DFConstants
 
 from .base import DFBase
+from .binary import decodeBinary, encodeBinary, isBinary
 from .block import DFBlock
+from .cache import DFLoadCache
 from .command import DFCommand
 from .command_field import DFCommandField
-from .common import cleanID, msFromEpoch
+from .common import cleanID, matchInclude, msFromEpoch
 from .connection import DFConnection
 from .constant_tie import DFConstantTie
 from .define import DFDefine
+from .indexed import DFIndexedBlob, encodeIndexed, isIndexed
+from .instances import decodeInstances, encodeInstances, hasInstances
 from .interconnect import DFInterconnect, DFInterconnectComponent
 from .port import DFPort
 from .register_group import DFRegisterGroup
 from .register import DFRegister, DFRegisterField
+from .register_table import DFRegisterTable
+from .shards import isSharded, readShards, writeShards
+from .stream import DFStreamReader
 
 # Define a list of types that can be stored as nodes in a DFProject, or within
 # the attributes bundle of any object.
@@ -42,6 +50,29 @@ subnode_types = [
     DFRegisterField, DFDefine, DFCommand, DFCommandField,
 ]
 
+# Dispatch table from the name of each node type to its class, covering both the
+# cleaned name written by DFProject.dumpObject and the class name written by
+# encapsulatedDump
+subnode_lookup = { x.__name__: x for x in subnode_types }
+subnode_lookup.update({ cleanID(x.__name__): x for x in subnode_types })
+
+# Order in which reloaded nodes are registered with a project - interconnects
+# then defines, followed by all other nodes in the order they were dumped
+subnode_order = { DFInterconnect: 0, DFDefine: 1 }
+
+def resolveNodeType(type_name):
+    """ Return the class matching an encapsulated node's type name
+
+    Args:
+        type_name: The name of the type from the dump
+    """
+    node_type = subnode_lookup.get(type_name)
+    if node_type == None:
+        node_type = subnode_lookup.get(cleanID(type_name))
+    if node_type == None:
+        raise Exception("Unable to resolve node type " + type_name)
+    return node_type
+
 class DFProject(DFBase):
     """
     DesignFormat top level project container, can collect nodes of different types
@@ -50,6 +81,10 @@ class DFProject(DFBase):
     to specify a focus for downstream tools.
     """
 
+    # Cached register table, with the root blocks it was exported from (see
+    # registerTable)
+    __registers = None
+
     def __init__(self, id=None, path=None):
         """ Constructor for the project object.
 
@@ -65,6 +100,12 @@ class DFProject(DFBase):
 
         self.nodes   = {}
 
+    def __getstate__(self):
+        """ Leave the cached register table out of pickled snapshots """
+        state = super(DFProject, self).__getstate__()
+        state.pop('_DFProject__registers', None)
+        return state
+
     def resolvePath(self, path):
         """
         Return a port or block definition based on a hierarchical path, only
@@ -171,6 +212,46 @@ class DFProject(DFBase):
         """
         return self.findNode(intc_id, DFInterconnect)
 
+    def registerTable(self):
+        """
+        Return a DFRegisterTable exporting the register groups, registers and
+        fields of every principal DFBlock and the blocks below them (see
+        DFBlock.registerTable). As there, the table is a snapshot which is
+        returned again until anything in the project's designs is modified or
+        the principal blocks change, and must not itself be modified.
+        """
+        roots  = self.getAllPrincipalNodes(desired=DFBlock)
+        cached = self.__registers
+        if (
+            cached == None or len(cached[0]) != len(roots) or
+            any((x is not y) for x, y in zip(cached[0], roots))
+        ):
+            # The principal blocks report modifications to the project, as
+            # their parent (see discardCache)
+            self.holdCache()
+            cached = self.__registers = (roots, DFRegisterTable(roots))
+        return cached[1]
+
+    def discardCache(self):
+        """ Discard the cached register table (see DFBase.markDirty) """
+        self.__registers = None
+
+    def verifyCache(self):
+        """
+        Check that every cached dump and content hash held by the nodes of the
+        project matches one calculated afresh, raising an exception if not (see
+        DFBlock.verifyCache). This is intended for checking tools which modify
+        designs in place.
+        """
+        for node in self.getAllPrincipalNodes():
+            if isinstance(node, DFBlock):
+                node.verifyCache(self)
+            elif node.contentHash() != node.contentHash(cached=False):
+                raise Exception(
+                    "Cached hash of %s %s is stale" % (type(node).__name__, node.id)
+                )
+        return self
+
     def getDefinition(self, key):
         """ Return a DFDefine matching a specific identifier
 
@@ -215,10 +296,18 @@ class DFProject(DFBase):
                 self.addReferenceNode(node)
         return self
 
-    def dumpObject(self):
+    def dumpObject(self, deduplicate=False, workers=None):
         """
         Dump out the project into a primitive dictionary, suitable for reloading
         at a later date. This dictionary can be separately saved to file as JSON.
+
+        Args:
+            deduplicate: Store blocks with identical contents (such as repeated
+                         instances of a module) once, as shared definitions
+                         referenced by lightweight instance records (see
+                         instances.py) - these are expanded again on load
+            workers    : Number of processes used to dump the top-level
+                         subtrees of each DFBlock in parallel
         """
         # Get our base object
         obj = super(DFProject, self).dumpObject(self)
@@ -234,21 +323,72 @@ class DFProject(DFBase):
         for node in self.nodes.values():
             obj['nodes'].append({
                 DFConstants.ATTRIBUTES.TYPE: cleanID(type(node).__name__),
-                DFConstants.ATTRIBUTES.DUMP: node.dumpObject(self)
+                DFConstants.ATTRIBUTES.DUMP: (
+                    node.dumpObject(self, workers=workers)
+                    if isinstance(node, DFBlock) else node.dumpObject(self)
+                )
             })
 
         # Return the object
-        return obj
+        return encodeInstances(obj) if deduplicate else obj
+
+    def dumpToFile(self, fh):
+        """
+        Write out the project as JSON to a file object, producing exactly the
+        same output as json.dumps(project.dumpObject()). Each node is written as
+        it is dumped (with DFBlock trees written incrementally by dumpStream), so
+        only a small part of the serialised design is held in memory at a time.
+
+        Args:
+            fh: File handle (opened in text mode) to write to
+        """
+        # Write the project's properties, leaving the object open
+        obj = super(DFProject, self).dumpObject(self)
+        obj['created'] = msFromEpoch(self.created)
+        obj['path']    = self.path
+        obj['version'] = self.version
+        fh.write(json.dumps(obj)[:-1] + ', ' + json.dumps('nodes') + ': [')
+
+        # Write each node in turn
+        for index, node in enumerate(self.nodes.values()):
+            fh.write(
+                (', ' if index > 0 else '') + '{' +
+                json.dumps(DFConstants.ATTRIBUTES.TYPE) + ': ' +
+                json.dumps(cleanID(type(node).__name__)) + ', ' +
+                json.dumps(DFConstants.ATTRIBUTES.DUMP) + ': '
+            )
+            if isinstance(node, DFBlock):
+                node.dumpStream(fh, self)
+            else:
+                fh.write(json.dumps(node.dumpObject(self)))
+            fh.write('}')
+
+        fh.write(']}')
+        return self
 
-    def loadObject(self, obj):
+    def loadObject(self, obj, lazy=False, trusted=False, include=None):
         """
         Populate this project with data from a primitive dictionary that has been
         previously dumped. This will construct child nodes, and then populate them
         with relevant details.
 
         Args:
-            obj: The dictionary to reload from
+            obj    : The dictionary to reload from
+            lazy   : Defer constructing the contents of blocks below each root
+                     DFBlock until they are first accessed (see DFBlock.materialise)
+            trusted: Skip the validation and re-sorting performed as each node
+                     is constructed - only suitable for dumps produced by
+                     dumpObject, which can be checked later using validate
+            include: Hierarchical path patterns (which may contain wildcards,
+                     e.g. 'top.subsys.dma*') selecting the blocks to construct
+                     - only blocks on, below or above the selected paths are
+                     built, and interconnects not used by them are dropped (see
+                     DFBlock.loadObject). Nodes other than blocks are unaffected
         """
+        # Expand any deduplicated blocks back into their full form
+        if hasInstances(obj):
+            obj = decodeInstances(obj)
+
         super(DFProject, self).loadObject(obj, None)
 
         # Check the versions match up
@@ -263,46 +403,290 @@ class DFProject(DFBase):
             self.path = obj['path']
 
         if 'nodes' in obj:
-            df_intc_id = cleanID(DFInterconnect.__name__)
-            df_def_id  = cleanID(DFDefine.__name__)
-
             # NOTE: Root nodes have the 'root=' attribute to loadObject set to
             #       None, so that they correctly identify that they are roots.
-
-            # First reload interconnects (as blocks may reference them)
-            for intc in (x for x in obj['nodes'] if cleanID(x[DFConstants.ATTRIBUTES.TYPE]) == df_intc_id):
-                new_intc = DFInterconnect().loadObject(intc[DFConstants.ATTRIBUTES.DUMP], self)
-                if new_intc.getAttribute(DFConstants.ATTRIBUTES.PRINCIPAL):
-                    self.addPrincipalNode(new_intc)
-                else:
-                    self.addReferenceNode(new_intc)
-
-            # Second reload defines (as blocks may reference them)
-            for define in (x for x in obj['nodes'] if cleanID(x[DFConstants.ATTRIBUTES.TYPE]) == df_def_id):
-                new_def = DFDefine().loadObject(define[DFConstants.ATTRIBUTES.DUMP], None)
-                if new_def.getAttribute(DFConstants.ATTRIBUTES.PRINCIPAL):
-                    self.addPrincipalNode(new_def)
-                else:
-                    self.addReferenceNode(new_def)
-
-            # Now reload all other nodes
+            # NOTE: Nodes only refer to one another by ID, so each one can be
+            #       constructed as it is encountered - registration with the
+            #       project is deferred so that the order matches subnode_order
+            loaded = []
             for node in obj['nodes']:
-                # Skip DFDefine or DFInterconnect as already handled
-                if cleanID(node[DFConstants.ATTRIBUTES.TYPE]) in [df_intc_id, df_def_id]:
-                    continue
-                # Identify and construct the node automatically
+                new_node = self.__loadNode(
+                    resolveNodeType(node[DFConstants.ATTRIBUTES.TYPE]),
+                    node[DFConstants.ATTRIBUTES.DUMP], lazy, trusted, include
+                )
+                # Blocks not selected by include are skipped
+                if new_node != None:
+                    loaded.append(new_node)
+            self.__addLoadedNodes(loaded)
+
+            if include != None:
+                self.__pruneInterconnects(lazy)
+
+        return self
+
+    def __loadNode(self, node_type, dump, lazy, trusted, include):
+        """ Construct a node from its dump, using the arguments its type expects
+
+        Args:
+            node_type: The class of the node
+            dump     : The dump of the node
+            lazy     : Whether to load DFBlock contents lazily
+            trusted  : Skip validation of the loaded values
+            include  : Hierarchical path patterns of the blocks to construct
+
+        Returns:
+            DFBase: The constructed node, or None for an unselected DFBlock
+        """
+        if node_type == DFBlock:
+            keep, sub_include = matchInclude(dump.get('path', dump['id']), include)
+            if not keep:
+                return None
+            return DFBlock().loadObject(dump, None, lazy, trusted, sub_include)
+        elif node_type == DFInterconnect:
+            return DFInterconnect().loadObject(dump, self, trusted)
+        else:
+            return node_type().loadObject(dump, None, trusted)
+
+    def __addLoadedNodes(self, nodes):
+        """ Register reloaded nodes with the project, ordered by subnode_order
+
+        Args:
+            nodes: The nodes to register, in the order they were dumped
+        """
+        for node in sorted(nodes, key=lambda x: subnode_order.get(type(x), 2)):
+            if node.getAttribute(DFConstants.ATTRIBUTES.PRINCIPAL):
+                self.addPrincipalNode(node)
+            else:
+                self.addReferenceNode(node)
+
+    def __pruneInterconnects(self, lazy):
+        """
+        Remove any DFInterconnects that are not used by the ports of the loaded
+        blocks, either directly or as a component of another interconnect. This
+        is skipped for lazily loaded projects, as the ports of blocks which have
+        not been materialised are not known.
+
+        Args:
+            lazy: Whether the blocks were loaded lazily
+        """
+        if lazy:
+            return
+        def collect(block):
+            required.update(x.type for x in block.getAllPorts())
+            for child in block.children:
+                collect(child)
+        required = set()
+        for node in self.nodes.values():
+            if isinstance(node, DFBlock):
+                collect(node)
+        # Chase the interconnects referenced by complex components
+        pending = list(required)
+        while len(pending) > 0:
+            intc = self.nodes.get(pending.pop())
+            if not isinstance(intc, DFInterconnect):
+                continue
+            for comp in intc.components:
+                if comp.isComplex() and comp.ref not in required:
+                    required.add(comp.ref)
+                    pending.append(comp.ref)
+        for key in list(self.nodes.keys()):
+            if isinstance(self.nodes[key], DFInterconnect) and key not in required:
+                del self.nodes[key]
+
+    def loadStream(self, stream, lazy=False, trusted=False, include=None):
+        """
+        Populate this project from a DFStreamReader positioned at the start of a
+        dumped project. Each node is constructed as it is parsed, and DFBlock
+        nodes are built incrementally (see DFBlock.loadStream) - meaning that the
+        dictionary form of the design is never fully materialised in memory. The
+        resulting project is identical to one produced by loadObject.
+
+        Args:
+            stream : The DFStreamReader to consume from
+            lazy   : Defer constructing the contents of blocks below each root
+                     DFBlock until they are first accessed
+            trusted: Skip validation of the loaded values (see loadObject)
+            include: Hierarchical path patterns of the blocks to construct (see
+                     loadObject)
+        """
+        head   = {}
+        loaded = None
+        for key in stream.iterObject():
+            # The project properties precede the nodes in a dump - but if the
+            # version isn't known yet, or the blocks are deduplicated, fall back
+            # to reading all nodes up-front
+            if key != 'nodes' or 'version' not in head or hasInstances(head):
+                head[key] = stream.readValue()
+                continue
+            self.loadObject(head, lazy, trusted, include)
+            loaded = []
+            for _ in stream.iterArray():
                 node_type = None
-                for item in subnode_types:
-                    if cleanID(item.__name__) == cleanID(node[DFConstants.ATTRIBUTES.TYPE]):
-                        node_type = item
-                        break
-                if not node_type:
-                    raise Exception("Unable to resolve node type " + node[DFConstants.ATTRIBUTES.TYPE])
-                new_node = node_type().loadObject(node[DFConstants.ATTRIBUTES.DUMP], None)
-                # Associate the node as principal if required
-                if new_node.getAttribute(DFConstants.ATTRIBUTES.PRINCIPAL):
-                    self.addPrincipalNode(new_node)
-                else:
-                    self.addReferenceNode(new_node)
+                new_node  = None
+                for n_key in stream.iterObject():
+                    if n_key == DFConstants.ATTRIBUTES.TYPE:
+                        node_type = resolveNodeType(stream.readValue())
+                    elif n_key != DFConstants.ATTRIBUTES.DUMP:
+                        stream.readValue()
+                    elif node_type == None:
+                        raise Exception("Node dumped before declaring its type")
+                    elif node_type == DFBlock:
+                        new_node = DFBlock().loadStream(stream, None, lazy, trusted, include)
+                    else:
+                        new_node = self.__loadNode(
+                            node_type, stream.readValue(), lazy, trusted, include
+                        )
+                # Blocks not selected by include are skipped
+                if new_node != None:
+                    loaded.append(new_node)
+            self.__addLoadedNodes(loaded)
+
+        if loaded == None:
+            return self.loadObject(head, lazy, trusted, include)
+
+        if include != None:
+            self.__pruneInterconnects(lazy)
+
+        return self
+
+    def loadFile(self, path, streaming=False, lazy=False, trusted=False, include=None):
+        """
+        Populate this project from a dumped file on disk. By default the whole
+        file is parsed and passed to loadObject, if streaming is enabled then it
+        is parsed incrementally using loadStream which greatly reduces the peak
+        memory required for large designs. Files written using dumpBinary or
+        dumpIndexed, and directories written using dumpShards, are detected
+        automatically.
+
+        Args:
+            path     : Path to the file to load
+            streaming: Whether to parse the file incrementally
+            lazy     : Defer constructing the contents of blocks below each root
+                       DFBlock until they are first accessed
+            trusted  : Skip validation of the loaded values (see loadObject)
+            include  : Hierarchical path patterns of the blocks to construct (see
+                       loadObject)
+        """
+        if isSharded(path):
+            return self.loadShards(path, lazy, trusted, include)
+        with open(path, 'rb') as fh:
+            marker = fh.read(16)
+            if isBinary(marker):
+                fh.seek(0)
+                return self.loadBinary(fh.read(), lazy, trusted, include)
+        if isIndexed(marker):
+            with DFIndexedBlob(path) as blob:
+                return self.loadObject(blob.readObject(), lazy, trusted, include)
+        with open(path, 'r') as fh:
+            if streaming:
+                return self.loadStream(DFStreamReader(fh), lazy, trusted, include)
+            else:
+                return self.loadObject(json.load(fh), lazy, trusted, include)
+
+    @classmethod
+    def load(cls, path, cache_dir=None, streaming=False, lazy=False, trusted=False,
+             max_size=(2 << 30), max_age=(7 * 24 * 60 * 60)):
+        """
+        Load a project from a dumped file on disk (see loadFile), optionally
+        using an on-disk cache of snapshots keyed by a hash of the file - where a
+        snapshot exists the project is restored from it rather than reloaded. If
+        the snapshot is missing, or was written by a different version of the
+        library, the file is loaded as normal and a new snapshot is written.
+
+        Args:
+            path     : Path to the file to load
+            cache_dir: Directory holding the cached snapshots (if None then the
+                       cache is not used)
+            streaming: Whether to parse the file incrementally
+            lazy     : Defer constructing the contents of blocks below each root
+                       DFBlock until they are first accessed
+            trusted  : Skip validation of the loaded values (see loadObject)
+            max_size : Maximum total size of the cache in bytes
+            max_age  : Maximum age of an unused snapshot in seconds
+
+        Returns:
+            DFProject: The loaded project
+        """
+        if cache_dir == None:
+            return cls().loadFile(path, streaming, lazy, trusted)
+        cache   = DFLoadCache(cache_dir, max_size=max_size, max_age=max_age)
+        key     = cache.getKey(path, { 'lazy': lazy })
+        project = cache.lookup(key)
+        if project == None:
+            project = cls().loadFile(path, streaming, lazy, trusted)
+            cache.store(key, project)
+        return project
+
+    def dumpBinary(self):
+        """
+        Dump out the project using the compact binary encoding, where strings
+        are de-duplicated and hierarchical paths are replaced by references to
+        a node table. The returned bytes can be saved to file and reloaded using
+        loadBinary or loadFile, and decode to exactly the same primitive
+        dictionary as returned by dumpObject.
+        """
+        return encodeBinary(self.dumpObject())
+
+    def dumpIndexed(self):
+        """
+        Dump out the project as an indexed container, where each node is binary
+        encoded separately and a table records where each one is stored. The
+        returned bytes can be saved to file and then opened with DFIndexedBlob
+        to decode single nodes without reading the rest of the file, or
+        reloaded in full with loadFile.
+        """
+        return encodeIndexed(self.dumpObject())
+
+    def dumpShards(self, directory):
+        """
+        Dump out the project as a directory of shards (see shards.py) - holding
+        a manifest, one shard for all of the nodes other than blocks and one per
+        root DFBlock and each of its top-level subsystems. Connections between
+        subsystems refer to blocks by hierarchical path, so each shard can be
+        read without the others. The directory can be reloaded in full or in
+        part using loadShards or loadFile.
+
+        Args:
+            directory: Directory to write the shards into (created if necessary)
+        """
+        writeShards(self.dumpObject(), directory)
+        return self
 
+    def loadShards(self, directory, lazy=False, trusted=False, include=None):
+        """
+        Populate this project from a directory written by dumpShards. Where
+        include patterns are provided, only the shards of the subsystems that
+        they select are read from disk.
+
+        Args:
+            directory: Directory holding the shards
+            lazy     : Defer constructing the contents of blocks below each root
+                       DFBlock until they are first accessed
+            trusted  : Skip validation of the loaded values (see loadObject)
+            include  : Hierarchical path patterns of the blocks to construct (see
+                       loadObject)
+        """
+        return self.loadObject(readShards(directory, include), lazy, trusted, include)
+
+    def loadBinary(self, data, lazy=False, trusted=False, include=None):
+        """ Populate this project from bytes produced by dumpBinary.
+
+        Args:
+            data   : The binary encoded project
+            lazy   : Defer constructing the contents of blocks below each root
+                     DFBlock until they are first accessed
+            trusted: Skip validation of the loaded values (see loadObject)
+            include: Hierarchical path patterns of the blocks to construct (see
+                     loadObject)
+        """
+        return self.loadObject(decodeBinary(data), lazy, trusted, include)
+
+    def validate(self):
+        """
+        Check every node held by the project, this performs the validation and
+        sorting that is skipped by a trusted load. Any lazily loaded blocks are
+        materialised in the process.
+        """
+        for node in self.nodes.values():
+            node.validate()
         return self
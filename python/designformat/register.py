@@ -21,7 +21,7 @@ from designformat import DFConstants
 from .base import DFBase
 from .command import DFCommand
 from .command_field import DFCommandField
-from .common import convert_to_class, DFShortcutList
+from .common import convert_to_class, internString, DFShortcutList
 
 class DFRegisterField(DFCommandField):
     """
@@ -29,7 +29,8 @@ class DFRegisterField(DFCommandField):
     special case of a DFCommandField. Currently no extra parameters are
     necessary, but the class is created for future extensibility.
     """
-    pass
+
+    __slots__ = ()
 
 class DFRegister(DFCommand):
     """
@@ -38,6 +39,11 @@ class DFRegister(DFCommand):
     However, unlike with commands, register fields should never overlap.
     """
 
+    __slots__ = ('offset', 'group', 'access')
+
+    OWNERS  = ('group',)
+    INDEXED = True
+
     def __init__(
         self, id=None, offset=None, bus_access=None, block_access=None,
         inst_access=None, group=None, description=None
@@ -59,10 +65,10 @@ class DFRegister(DFCommand):
         self.offset = offset
         self.group  = group
         self.access = convert_to_class({
-            "bus"  : bus_access   if bus_access   != None else DFConstants.ACCESS.RW,
-            "block": block_access if block_access != None else DFConstants.ACCESS.RW,
-            "inst" : inst_access  if inst_access  != None else DFConstants.ACCESS.RW
-        })
+            "bus"  : internString(bus_access   if bus_access   != None else DFConstants.ACCESS.RW),
+            "block": internString(block_access if block_access != None else DFConstants.ACCESS.RW),
+            "inst" : internString(inst_access  if inst_access  != None else DFConstants.ACCESS.RW)
+        }, self)
 
         for key in self.access:
             if self.access[key] not in DFConstants.ACCESS.values():
@@ -133,20 +139,23 @@ class DFRegister(DFCommand):
         del obj['width']
 
         obj['offset'] = self.offset
-        obj['access'] = self.access.dict()
+        obj['access'] = dict(self.access.dict())
 
         return obj
 
-    def loadObject(self, obj, root):
+    def loadObject(self, obj, root, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate)
         """
-        super(DFRegister, self).loadObject(obj, root)
+        super(DFRegister, self).loadObject(obj, root, trusted)
 
         self.offset = obj['offset']
-        self.access = convert_to_class(obj['access'])
+        self.access = convert_to_class({
+            key: internString(value) for key, value in obj['access'].items()
+        }, self)
 
         return self
@@ -17,12 +17,18 @@
 #
 
 from .base import DFBase
-from .common import DFShortcutList
+from .common import DFShortcutList, hashDump, internString
 from .register import DFRegister
 
 class DFRegisterGroup(DFBase):
     """ DesignFormat representation of a named group of registers """
 
+    OWNERS  = ('block',)
+    INDEXED = True
+
+    # Cached content hash, discarded when the group is marked dirty
+    __hash = None
+
     def __init__(self, id=None, offset=0, block=None, description=None):
         """ Constructor for the register group object.
 
@@ -35,7 +41,7 @@ class DFRegisterGroup(DFBase):
         super(DFRegisterGroup, self).__init__(id, description)
         self.offset    = offset
         self.block     = block
-        self.registers = DFShortcutList('id')
+        self.registers = DFShortcutList('id', self)
 
     def addRegister(self, reg):
         """ Add a new register and sort the list by ascending address
@@ -50,6 +56,7 @@ class DFRegisterGroup(DFBase):
         reg.group = self
         self.registers.append(reg)
         self.sortRegisters()
+        self.markDirty()
 
     def sortRegisters(self):
         """
@@ -69,10 +76,60 @@ class DFRegisterGroup(DFBase):
                 )
             last_reg = reg
 
+    def validate(self):
+        """ Sort and check all of the registers held by the group """
+        self.sortRegisters()
+        for reg in self.registers:
+            if reg.offset < 0:
+                raise Exception("Invalid offset of %i for register %s" % (reg.offset, reg.id))
+            reg.validate()
+        return self
+
     def getOffset(self):
         """ Return this register group's offset """
         return self.offset
 
+    def contentHash(self, cached=True):
+        """
+        Return the hash of the group, combining the hash of its own properties
+        with the (cached) hashes of each register - so modifying one register
+        only requires that register to be rehashed.
+
+        Args:
+            cached: Whether the cached hash may be reused (see DFBase)
+        """
+        if self.__hash == None or not cached:
+            obj = super(DFRegisterGroup, self).dumpObject(None)
+            obj['offset'] = self.offset
+            self.__hash = hashDump([
+                hashDump(obj), [x.contentHash(cached) for x in self.registers]
+            ])
+        return self.__hash
+
+    def __setattr__(self, key, value):
+        """ Report replacing the list of registers to the block indexing them
+
+        Args:
+            key  : The attribute being set
+            value: The value to set
+        """
+        super(DFRegisterGroup, self).__setattr__(key, value)
+        if key == 'registers':
+            self.entriesChanged()
+
+    def heldLists(self):
+        """ Return the list of registers (see DFBase) """
+        return (self.registers, )
+
+    def entriesChanged(self):
+        """ Report changes to the registers to the block indexing them """
+        if isinstance(self.block, DFBase):
+            self.block.entriesChanged()
+
+    def discardCache(self):
+        """ Discard the cached hash (see DFBase.markDirty) """
+        self.__hash = None
+
     def dumpObject(self, project):
         """ Dump out this node so that it can be reloaded
 
@@ -87,37 +144,48 @@ class DFRegisterGroup(DFBase):
 
         return obj
 
-    def loadObject(self, obj, root):
+    def loadObject(self, obj, root, trusted=False):
         """ Reload this node from passed in object.
 
         Args:
-            obj  : Description of this node
-            root : Root object in the tree
+            obj    : Description of this node
+            root   : Root object in the tree
+            trusted: Skip validation of the loaded values (see validate), the
+                     registers are assumed to already be in order
         """
         super(DFRegisterGroup, self).loadObject(obj, root)
 
+        # The same names are repeated in every instance of a register map
+        self.id = internString(self.id)
+
         if 'offset' in obj:
             self.offset = obj['offset']
 
-        if 'registers' in obj:
+        if 'registers' in obj and trusted:
+            for field in obj['registers']:
+                reg       = (DFRegister()).loadObject(field, root, True)
+                reg.group = self
+                self.registers.append(reg)
+        elif 'registers' in obj:
             for field in obj['registers']:
                 self.addRegister((DFRegister()).loadObject(field, root))
 
-        self.sortRegisters()
+        if not trusted:
+            self.sortRegisters()
 
         return self
 
-    def __getattribute__(self, key):
+    def __getattr__(self, key):
         """
-        By overriding __getattribute__ we can expose all registers as if they
-        were first class attributes of this object. Note that this code
-        prioritises true class properties.
+        By overriding __getattr__ we can expose all registers as if they were
+        first class attributes of this object. Note that this is only called
+        when no true class property matches the key.
         """
-        try:
-            return super(DFRegisterGroup, self).__getattribute__(key)
-        except AttributeError as e:
-            # Does the key relate to one of our registers?
-            if len(self.registers) > 0 and key in self.registers.keys():
-                return self.registers[key]
-            # Oterhwise, if we get this far without returning raise an exception
-            raise e
\ No newline at end of file
+        # The registers are looked up through the index of the shortcut list,
+        # which is itself an attribute (and may not be set while unpickling)
+        entry = self.registers.get_entry(key) if key != 'registers' else None
+        if entry is None:
+            raise AttributeError(
+                "'%s' object has no attribute '%s'" % (type(self).__name__, key)
+            )
+        return entry
\ No newline at end of file
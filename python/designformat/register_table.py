@@ -0,0 +1,313 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Columnar export of the register groups, registers and register fields held
+# by a hierarchy of DFBlocks (see DFBlock.registerTable), so that bulk queries
+# over register-heavy designs don't have to walk the objects.
+#
+# Tables:
+#
+#  - GROUPS   : One row per DFRegisterGroup
+#  - REGISTERS: One row per DFRegister
+#  - FIELDS   : One row per DFRegisterField
+#
+# The columns of each table are listed in COLUMNS. Rows refer to the block that
+# holds them by index into the table's list of blocks, and to the group and
+# register above them by row. Register offsets are absolute within the block's
+# register bank (see DFRegister.getOffset), and each field row repeats the
+# offset and access types of its register. Access types are held as codes,
+# indexing ACCESS.
+#
+# Where NumPy is available each table is a structured array, otherwise it is a
+# dict of columns held as arrays. Either way, select finds the rows matching a
+# set of conditions (calling any predicate with each value of the column, as a
+# Python value) and getObjects maps rows back to the objects they describe.
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from designformat import DFConstants
+
+from .base import DFBase
+
+GROUPS    = 'groups'
+REGISTERS = 'registers'
+FIELDS    = 'fields'
+BLOCKS    = 'blocks'
+
+# Columns of each table
+COLUMNS = {
+    GROUPS   : ('block', 'offset'),
+    REGISTERS: (
+        'block', 'group', 'offset', 'width', 'bus_access', 'block_access',
+        'inst_access'
+    ),
+    FIELDS   : (
+        'block', 'group', 'register', 'offset', 'lsb', 'size', 'reset',
+        'signed', 'bus_access', 'block_access', 'inst_access'
+    ),
+}
+
+# Access types, in order of their codes - unrecognised types are held as -1
+ACCESS       = tuple(DFConstants.ACCESS.values())
+ACCESS_CODES = { x: y for y, x in enumerate(ACCESS) }
+
+# Columns holding access codes, with the key of the register's access they hold
+ACCESS_COLUMNS = {
+    'bus_access': 'bus', 'block_access': 'block', 'inst_access': 'inst'
+}
+
+# Columns referring to the row of another table, or to a block by index into
+# the list of blocks (BLOCKS)
+REFERENCE_COLUMNS = { 'block': BLOCKS, 'group': GROUPS, 'register': REGISTERS }
+
+# Type codes of the columns, with any not listed held as 64-bit integers
+TYPE_CODES = { 'signed': ('?', 'b') }
+TYPE_CODE  = ('i8', 'q')
+
+# Range of values that fit in a 64-bit column, reset values outside of it are
+# held as Python integers instead
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+class DFRegisterTable(object):
+    """
+    Columnar export of the register groups, registers and register fields held
+    by a number of DFBlocks and everything below them.
+    """
+
+    def __init__(self, blocks):
+        """ Construct the tables from a list of blocks
+
+        Args:
+            blocks: The DFBlocks to export, each along with all of its children
+        """
+        self.blocks  = []
+        self.objects = { GROUPS: [], REGISTERS: [], FIELDS: [] }
+        self.__rows  = None
+        values = { x: { y: [] for y in COLUMNS[x] } for x in COLUMNS }
+        pending = list(reversed(blocks))
+        while len(pending) > 0:
+            block = pending.pop()
+            self.__gather(block, values)
+            pending.extend(reversed(block.children))
+        self.groups    = self.__buildTable(GROUPS, values[GROUPS])
+        self.registers = self.__buildTable(REGISTERS, values[REGISTERS])
+        self.fields    = self.__buildTable(FIELDS, values[FIELDS])
+
+    def __gather(self, block, values):
+        """ Collect the values of each row describing a block's registers
+
+        Args:
+            block : The block to export (not including its children)
+            values: Lists of values of each column of each table to append to
+        """
+        # Each exported node is tracked, so that the table is discarded when any
+        # of them is modified (see DFBase.holdCache)
+        block_row = len(self.blocks)
+        self.blocks.append(block)
+        block.holdCache()
+        groups, registers, fields = values[GROUPS], values[REGISTERS], values[FIELDS]
+        for group in block.registers:
+            group_row = len(self.objects[GROUPS])
+            self.objects[GROUPS].append(group)
+            group.holdCache()
+            groups['block'].append(block_row)
+            groups['offset'].append(group.offset)
+            for reg in group.registers:
+                reg_row = len(self.objects[REGISTERS])
+                self.objects[REGISTERS].append(reg)
+                reg.holdCache()
+                offset = reg.getOffset()
+                access = [
+                    (x, ACCESS_CODES.get(reg.access[y], -1))
+                    for x, y in ACCESS_COLUMNS.items()
+                ]
+                registers['block'].append(block_row)
+                registers['group'].append(group_row)
+                registers['offset'].append(offset)
+                width = 0
+                for field in reg.fields:
+                    self.objects[FIELDS].append(field)
+                    field.holdCache()
+                    fields['block'].append(block_row)
+                    fields['group'].append(group_row)
+                    fields['register'].append(reg_row)
+                    fields['offset'].append(offset)
+                    fields['lsb'].append(field.lsb)
+                    fields['size'].append(field.size)
+                    fields['reset'].append(field.reset)
+                    fields['signed'].append(bool(field.signed))
+                    for key, code in access:
+                        fields[key].append(code)
+                    width = max(width, field.lsb + field.size)
+                registers['width'].append(width)
+                for key, code in access:
+                    registers[key].append(code)
+
+    def __buildTable(self, kind, values):
+        """ Convert the collected values of one table into its columns
+
+        Args:
+            kind  : The table being built (GROUPS, REGISTERS or FIELDS)
+            values: Lists of values of each column
+        """
+        codes = {
+            x: TYPE_CODES.get(x, TYPE_CODE) for x in COLUMNS[kind]
+        }
+        # Reset values wider than 64 bits can't be held in a fixed width column
+        if 'reset' in codes and any((x < INT_MIN or x > INT_MAX) for x in values['reset']):
+            codes['reset'] = ('O', None)
+        if numpy != None:
+            table = numpy.zeros(
+                len(self.objects[kind]), dtype=[(x, codes[x][0]) for x in COLUMNS[kind]]
+            )
+            for key in COLUMNS[kind]:
+                table[key] = values[key]
+            return table
+        return {
+            x: (array(codes[x][1], values[x]) if codes[x][1] else values[x])
+            for x in COLUMNS[kind]
+        }
+
+    def getTable(self, kind):
+        """ Return one of the tables
+
+        Args:
+            kind: The table to return (GROUPS, REGISTERS or FIELDS)
+        """
+        if kind not in COLUMNS:
+            raise Exception("Unknown register table " + str(kind))
+        return getattr(self, kind)
+
+    def getCount(self, kind):
+        """ Return the number of rows in one of the tables
+
+        Args:
+            kind: The table to count (GROUPS, REGISTERS or FIELDS)
+        """
+        return len(self.objects[kind])
+
+    def getRow(self, obj):
+        """ Return the row describing a block, register group or register
+
+        Args:
+            obj: The object to lookup
+        """
+        return self.__lookup(obj)[1]
+
+    def __lookup(self, obj):
+        """ Return the table (or BLOCKS) and row describing an object
+
+        Args:
+            obj: The block, register group or register to lookup
+        """
+        if self.__rows == None:
+            self.__rows = {}
+            for kind, objects in ((BLOCKS, self.blocks), (GROUPS, self.objects[GROUPS]),
+                                  (REGISTERS, self.objects[REGISTERS])):
+                self.__rows.update({ id(x): (kind, y) for y, x in enumerate(objects) })
+        entry = self.__rows.get(id(obj))
+        if entry == None:
+            raise Exception("%s %s is not held in the register table" % (
+                type(obj).__name__, obj.id
+            ))
+        return entry
+
+    def __encode(self, column, value):
+        """ Convert a value compared against a column into the form it holds
+
+        Args:
+            column: The column being compared
+            value : The value to compare against
+        """
+        if column in ACCESS_COLUMNS and isinstance(value, str):
+            if value not in ACCESS_CODES:
+                raise Exception("Unknown access type " + value)
+            return ACCESS_CODES[value]
+        elif column in REFERENCE_COLUMNS and isinstance(value, DFBase):
+            kind, row = self.__lookup(value)
+            if kind != REFERENCE_COLUMNS[column]:
+                raise Exception("Column %s can't refer to %s %s" % (
+                    column, type(value).__name__, value.id
+                ))
+            return row
+        return value
+
+    def select(self, kind, **conditions):
+        """
+        Return the rows of one of the tables matching every condition. Each is
+        either a value the column must equal (an access type, or the object a
+        reference column refers to, may be given directly) or a predicate that
+        is called with each value of the column (as a Python value, whether or
+        not NumPy is available) and returns whether the row matches. The rows
+        are returned as a list, in ascending order.
+
+        Args:
+            kind      : The table to query (GROUPS, REGISTERS or FIELDS)
+            conditions: The condition on each column, keyed by column name
+
+        Example:
+            rows = table.select(FIELDS, bus_access='RW', reset=lambda x: x != 0)
+        """
+        table = self.getTable(kind)
+        for column in conditions:
+            if column not in COLUMNS[kind]:
+                raise Exception("Unknown column %s of register table %s" % (column, kind))
+        if numpy != None:
+            mask = numpy.ones(len(table), dtype=bool)
+            for column, cond in conditions.items():
+                if callable(cond):
+                    mask &= numpy.fromiter(
+                        (bool(cond(x)) for x in table[column].tolist()),
+                        dtype=bool, count=len(table)
+                    )
+                else:
+                    mask &= (table[column] == self.__encode(column, cond))
+            return numpy.flatnonzero(mask).tolist()
+        rows = range(self.getCount(kind))
+        for column, cond in conditions.items():
+            values = table[column]
+            if callable(cond):
+                rows = [x for x in rows if cond(values[x])]
+            else:
+                value = self.__encode(column, cond)
+                rows  = [x for x in rows if values[x] == value]
+        return list(rows)
+
+    def getObjects(self, kind, rows):
+        """ Return the objects described by a number of rows of one table
+
+        Args:
+            kind: The table the rows belong to (GROUPS, REGISTERS or FIELDS)
+            rows: The rows to lookup (for example as returned by select)
+        """
+        objects = self.objects[kind]
+        return [objects[x] for x in rows]
+
+    def getAccess(self, code):
+        """ Return the access type represented by a code
+
+        Args:
+            code: The access code to decode
+        """
+        return ACCESS[code] if code >= 0 else None
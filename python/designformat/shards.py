@@ -0,0 +1,185 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Sharded form of a dumped DFProject, written as a directory of JSON files so
+# that consumers can read only the parts of the design they need, and an edit
+# only changes the files holding the modified parts.
+#
+# Layout:
+#
+#  - MANIFEST: The project's properties, along with the type and ID of every
+#    node in order and the shard holding it, and the hash of every shard (so
+#    that rewriting the project skips the shards that haven't changed)
+#  - NODES: Every node other than a DFBlock (interconnects, defines, etc.),
+#    keyed by ID
+#  - BLOCKS/<path>.json: One shard per root DFBlock, holding its dump with each
+#    child replaced by a reference of the form { "id": ..., "shard": ... }, and
+#    one shard per child holding the child's full dump
+#
+# Connections and address maps refer to blocks by hierarchical path, so those
+# crossing between shards are held by the root block and resolved on load.
+
+import hashlib
+import json
+import os
+import tempfile
+
+from designformat import DFConstants
+
+from .common import cleanID, matchInclude
+
+MANIFEST = "manifest.json"
+NODES    = "nodes.json"
+BLOCKS   = "blocks"
+HASHES   = "shards"
+
+def isSharded(path):
+    """ Check whether a path is a directory holding a sharded project
+
+    Args:
+        path: The path to check
+    """
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+def writeJSON(path, obj):
+    """
+    Write an object as JSON, via a temporary file that is moved into place so
+    that a partially written file is never observed.
+
+    Args:
+        path: Path of the file to write
+        obj : The object to write, or its JSON text
+    """
+    handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as fh:
+            fh.write(obj if isinstance(obj, str) else json.dumps(obj))
+        os.replace(temp, path)
+    except:
+        os.remove(temp)
+        raise
+
+def readHashes(directory):
+    """ Return the hashes of the shards recorded by an existing manifest
+
+    Args:
+        directory: Directory holding the shards
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST), 'r') as fh:
+            return json.load(fh).get(HASHES, {})
+    except (OSError, ValueError):
+        return {}
+
+def writeShards(obj, directory):
+    """
+    Write a dumped DFProject as a set of shards. Shards whose contents match
+    the hash recorded by the existing manifest are not rewritten, and block
+    shards that are no longer referenced are removed. The manifest is written
+    last, so readers never see it refer to shards that are yet to be written.
+
+    Args:
+        obj      : The dumped project, as produced by DFProject.dumpObject
+        directory: Directory to write into (created if necessary)
+    """
+    os.makedirs(os.path.join(directory, BLOCKS), exist_ok=True)
+    previous = readHashes(directory)
+    hashes   = {}
+
+    def write_shard(shard, dump):
+        text   = json.dumps(dump)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        path   = os.path.join(directory, shard)
+        if previous.get(shard) != digest or not os.path.isfile(path):
+            writeJSON(path, text)
+        hashes[shard] = digest
+        return shard
+
+    def write_block(dump):
+        return write_shard(os.path.join(BLOCKS, dump['path'] + '.json'), dump)
+
+    manifest = { x: y for x, y in obj.items() if x != 'nodes' }
+    manifest['nodes'] = []
+    others = {}
+    for node in obj.get('nodes', []):
+        node_type = node[DFConstants.ATTRIBUTES.TYPE]
+        dump      = node[DFConstants.ATTRIBUTES.DUMP]
+        if cleanID(node_type) == 'dfblock':
+            root = dict(dump)
+            if 'children' in root:
+                root['children'] = [
+                    { 'id': x['id'], 'shard': write_block(x) } for x in dump['children']
+                ]
+            shard = write_block(root)
+        else:
+            others[dump['id']] = node
+            shard = NODES
+        manifest['nodes'].append({
+            DFConstants.ATTRIBUTES.TYPE: node_type, 'id': dump['id'], 'shard': shard
+        })
+    write_shard(NODES, others)
+    manifest[HASHES] = hashes
+    writeJSON(os.path.join(directory, MANIFEST), manifest)
+
+    # Remove the shards of blocks that no longer exist, once the manifest no
+    # longer refers to them
+    for name in os.listdir(os.path.join(directory, BLOCKS)):
+        if name.endswith('.json') and os.path.join(BLOCKS, name) not in hashes:
+            os.remove(os.path.join(directory, BLOCKS, name))
+
+def readShards(directory, include=None):
+    """
+    Read a sharded project back into the form produced by DFProject.dumpObject,
+    only reading the shards of the blocks selected by the include patterns.
+
+    Args:
+        directory: Directory holding the shards
+        include  : Hierarchical path patterns of the blocks to read (see
+                   DFProject.loadObject), or None to read every shard
+
+    Returns:
+        dict: The dumped project, omitting any blocks that weren't selected
+    """
+    def read(shard):
+        with open(os.path.join(directory, shard), 'r') as fh:
+            return json.load(fh)
+
+    with open(os.path.join(directory, MANIFEST), 'r') as fh:
+        manifest = json.load(fh)
+    obj = { x: y for x, y in manifest.items() if x not in ('nodes', HASHES) }
+    obj['nodes'] = []
+    others = None
+    for entry in manifest.get('nodes', []):
+        if entry['shard'] == NODES:
+            if others == None:
+                others = read(NODES)
+            obj['nodes'].append(others[entry['id']])
+            continue
+        if not matchInclude(entry['id'], include)[0]:
+            continue
+        dump = read(entry['shard'])
+        if 'children' in dump:
+            dump['children'] = [
+                read(x['shard']) for x in dump['children']
+                if matchInclude(dump['path'] + '.' + x['id'], include)[0]
+            ]
+        obj['nodes'].append({
+            DFConstants.ATTRIBUTES.TYPE: entry[DFConstants.ATTRIBUTES.TYPE],
+            DFConstants.ATTRIBUTES.DUMP: dump
+        })
+    return obj
@@ -0,0 +1,171 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import json
+import re
+
+# Matches any run of JSON whitespace
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Characters which may follow a complete value
+TERMINATORS = " \t\n\r,]}:"
+
+# Matches the remainder of a buffer that could continue a truncated number
+NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*\Z")
+
+class DFStreamReader(object):
+    """
+    Incremental reader for JSON documents, which allows a dumped DFProject to be
+    walked one entry at a time without ever holding the whole parsed tree in
+    memory. The caller drives the reader by iterating objects and arrays, and
+    by decoding the values that it wants to keep - every value yielded by the
+    iterators must be consumed (by readValue or by a nested iterator) before
+    the iteration is advanced.
+    """
+
+    def __init__(self, fh, chunk_size=(1 << 20)):
+        """ Constructor for the stream reader
+
+        Args:
+            fh        : File handle (opened in text mode) to read from
+            chunk_size: Number of characters to read from the file at a time
+        """
+        self.__fh      = fh
+        self.__chunk   = chunk_size
+        self.__buffer  = ""
+        self.__pos     = 0
+        self.__eof     = False
+        self.__decoder = json.JSONDecoder()
+
+    def __fill(self, size=None):
+        """
+        Read more data from the file, discarding the consumed part of the buffer.
+
+        Args:
+            size: Minimum number of characters to read (defaults to chunk size)
+
+        Returns:
+            bool: False if the end of the file has been reached
+        """
+        if self.__eof:
+            return False
+        data = self.__fh.read(max(self.__chunk, size if size != None else 0))
+        if not data:
+            self.__eof = True
+            return False
+        self.__buffer = self.__buffer[self.__pos:] + data
+        self.__pos    = 0
+        return True
+
+    def __position(self):
+        """ Return a description of the current position for error messages """
+        return repr(self.__buffer[self.__pos:self.__pos+20])
+
+    def peek(self):
+        """
+        Skip any whitespace and return the next character in the stream without
+        consuming it, returns None when the end of the stream has been reached.
+        """
+        while True:
+            self.__pos = WHITESPACE.match(self.__buffer, self.__pos).end()
+            if self.__pos < len(self.__buffer):
+                return self.__buffer[self.__pos]
+            elif not self.__fill():
+                return None
+
+    def __consume(self, char):
+        """ Consume a specific structural character from the stream
+
+        Args:
+            char: The expected character
+        """
+        if self.peek() != char:
+            raise Exception(
+                "Expected '%s' in JSON stream at %s" % (char, self.__position())
+            )
+        self.__pos += 1
+
+    def readValue(self):
+        """ Decode and return the next complete value from the stream """
+        if self.peek() == None:
+            raise Exception("Unexpected end of JSON stream")
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+                # A number cut short by the end of the buffer may decode as a
+                # shorter number (e.g. '1.' or '1e' decode as '1'), so unless
+                # the value is followed by a terminator read more data and
+                # decode it again
+                complete = (
+                    (end < len(self.__buffer) and self.__buffer[end] in TERMINATORS) or
+                    not NUMBER_TAIL.match(self.__buffer, end)
+                )
+                if complete or not self.__fill():
+                    self.__pos = end
+                    return value
+            except json.JSONDecodeError:
+                # Double the amount of data available each time, so that large
+                # values are not repeatedly re-decoded
+                if not self.__fill(len(self.__buffer) - self.__pos):
+                    raise
+
+    def iterObject(self):
+        """
+        Iterate through the keys of the next object in the stream, after each
+        key is yielded the stream is positioned at the start of its value.
+        """
+        self.__consume('{')
+        if self.peek() == '}':
+            self.__pos += 1
+            return
+        while True:
+            key = self.readValue()
+            if not isinstance(key, str):
+                raise Exception("Expected a key in JSON stream, got " + repr(key))
+            self.__consume(':')
+            yield key
+            char = self.peek()
+            self.__pos += 1
+            if char == '}':
+                return
+            elif char != ',':
+                raise Exception(
+                    "Expected ',' or '}' in JSON stream at %s" % self.__position()
+                )
+
+    def iterArray(self):
+        """
+        Iterate through the entries of the next array in the stream, after each
+        index is yielded the stream is positioned at the start of that entry.
+        """
+        self.__consume('[')
+        if self.peek() == ']':
+            self.__pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self.__pos += 1
+            if char == ']':
+                return
+            elif char != ',':
+                raise Exception(
+                    "Expected ',' or ']' in JSON stream at %s" % self.__position()
+                )
@@ -0,0 +1,129 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Shared fixtures for the tests, providing a small design which exercises every
+# type of node - interconnects (including a complex component), defines, a block
+# hierarchy with connections, register groups, an address map and a command.
+# The address map holds no constraints, as they are keyed differently once
+# reloaded (by the initiator alone) so don't reproduce the same dump.
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from designformat import *
+
+def buildProject(subs=3, leaves=3, width=4):
+    """ Construct a design with a top block, its subsystems and their leaves
+
+    Args:
+        subs  : Number of subsystems below the top block
+        leaves: Number of leaf blocks below each subsystem
+        width : Signal count of the data ports
+    """
+    project = DFProject('proj', '/tmp/src.yaml')
+    clock = DFInterconnect('clock', DFConstants.ROLE.MASTER, 'clk', project)
+    clock.addComponent(DFInterconnectComponent(
+        'clk', DFConstants.ROLE.MASTER, '', DFConstants.COMPONENT.SIMPLE, 1, 1, 0,
+        None, project
+    ))
+    data = DFInterconnect('data', DFConstants.ROLE.MASTER, 'data', project)
+    data.addComponent(DFInterconnectComponent(
+        'd', DFConstants.ROLE.MASTER, '', DFConstants.COMPONENT.SIMPLE, 32, 1, 0,
+        None, project
+    ))
+    bus = DFInterconnect('bus', DFConstants.ROLE.MASTER, 'bus', project)
+    bus.addComponent(DFInterconnectComponent(
+        'wr', DFConstants.ROLE.MASTER, '', DFConstants.COMPONENT.COMPLEX, 'data',
+        2, 0, None, project
+    ))
+    for node in (clock, data, bus, DFDefine('WIDTH', 32, 'the width')):
+        project.addReferenceNode(node)
+
+    top = DFBlock('top', 'top_t', None, 'Top block')
+    top.setAttribute('FOO', 'bar')
+    top.addPort(DFPort('clk', 'clock', 1, DFConstants.DIRECTION.INPUT, top))
+    top.addPort(DFPort('din', 'bus', width, DFConstants.DIRECTION.INPUT, top))
+    top.addPort(DFPort('dout', 'bus', width, DFConstants.DIRECTION.OUTPUT, top))
+    top.setAddressMap(DFAddressMap())
+    initiator = DFAddressMapInitiator(top.ports.input.din, 0, 0xFFFF, 0)
+    top.address_map.addInitiator(initiator)
+
+    for index in range(subs):
+        sub = DFBlock('sub%d' % index, 'sub_t', top, 'subsystem')
+        top.addChild(sub)
+        sub.addPort(DFPort('clk', 'clock', 1, DFConstants.DIRECTION.INPUT, sub))
+        sub.addPort(DFPort('din', 'bus', width, DFConstants.DIRECTION.INPUT, sub))
+        sub.addPort(DFPort('dout', 'bus', width, DFConstants.DIRECTION.OUTPUT, sub))
+        top.addConnection(top.ports.input.clk, 0, sub.ports.input.clk, 0)
+        for signal in range(width):
+            top.addConnection(top.ports.input.din, signal, sub.ports.input.din, signal)
+        if index == 0:
+            for signal in range(width):
+                top.addConnection(sub.ports.output.dout, signal, top.ports.output.dout, signal)
+        target = DFAddressMapTarget(sub.ports.input.din, 0, 0x1000 * index, 0x1000)
+        top.address_map.addTarget(target)
+        group = DFRegisterGroup('grp', 0x100 * index, None, 'group')
+        for offset in range(3):
+            reg = DFRegister(
+                'reg%d' % offset, offset * 4, DFConstants.ACCESS.RW,
+                DFConstants.ACCESS.RO, None, None, 'register'
+            )
+            reg.addField(DFRegisterField('f0', 0, 4, 1, False, 'f0'))
+            reg.addField(DFRegisterField('f1', 8, 16, 0, False))
+            group.addRegister(reg)
+        sub.addRegister(group)
+        for leaf_index in range(leaves):
+            leaf = DFBlock('leaf%d' % leaf_index, 'leaf_t', sub)
+            sub.addChild(leaf)
+            leaf.addPort(DFPort('clk', 'clock', 1, DFConstants.DIRECTION.INPUT, leaf))
+            leaf.addPort(DFPort('din', 'bus', width, DFConstants.DIRECTION.INPUT, leaf))
+            sub.addConnection(sub.ports.input.clk, 0, leaf.ports.input.clk, 0)
+            for signal in range(width):
+                sub.addConnection(sub.ports.input.din, signal, leaf.ports.input.din, signal)
+    project.addPrincipalNode(top)
+
+    command = DFCommand('cmd', 32, 'a command')
+    command.addField(DFCommandField('op', 0, 8, 0, False, 'op'))
+    command.addField(DFCommandField('arg', 8, 24, 0, False))
+    project.addReferenceNode(command)
+    return project
+
+def canonical(obj):
+    """
+    Serialise a project's dump as JSON text, so that dumps can be compared
+    exactly - leaving out the creation time, which is not reloaded exactly.
+
+    Args:
+        obj: The dump to serialise
+    """
+    return json.dumps({ x: y for x, y in obj.items() if x != 'created' }, sort_keys=True)
+
+@pytest.fixture
+def project():
+    """ A freshly constructed design (see buildProject) """
+    return buildProject()
+
+@pytest.fixture
+def dump(project):
+    """ The dump of the design, as returned by dumpObject """
+    return json.loads(json.dumps(project.dumpObject()))
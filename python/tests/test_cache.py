@@ -0,0 +1,177 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Tests that the values cached by nodes (dumps, content hashes, hierarchical
+# paths, register tables and the indexes of shortcut lists) are discarded when
+# the nodes they're derived from are modified, and only then.
+
+import json
+
+import pytest
+
+from designformat import *
+from designformat.register_table import FIELDS, REGISTERS
+
+from conftest import canonical
+
+def getTop(project):
+    """ Return the top block of a project """
+    return project.getAllPrincipalNodes(desired=DFBlock)[0]
+
+def isTracked(node):
+    """ Check whether modifications to a node are reported (see holdCache) """
+    return node._DFBase__tracked
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_edit(dump, lazy):
+    project = DFProject().loadObject(dump, lazy=lazy)
+    top     = getTop(project)
+    project.dumpObject()
+    digest  = top.contentHash()
+    top.sub0.leaf1.ports.input.din.description = 'edited'
+    obj = top.dumpObject(project)
+    assert obj['children'][0]['children'][1]['ports']['input'][1]['description'] == 'edited'
+    assert top.contentHash() != digest
+    project.verifyCache()
+
+def test_rename(project):
+    top = getTop(project)
+    project.dumpObject()
+    top.contentHash()
+    assert top.sub1.leaf0.hierarchicalPath() == 'top.sub1.leaf0'
+    top.sub1.id = 'renamed'
+    # The paths, dumps and hashes of the blocks below are discarded too
+    assert top.renamed.leaf0.hierarchicalPath() == 'top.renamed.leaf0'
+    assert top.renamed.leaf0.ports.input.clk.hierarchicalPath() == 'top.renamed.leaf0[clk]'
+    leaf = top.dumpObject(project)['children'][1]['children'][0]
+    assert leaf['path'] == 'top.renamed.leaf0' and leaf['parent'] == 'top.renamed'
+    assert top.resolvePath('top.renamed.leaf0') is top.renamed.leaf0
+    project.verifyCache()
+
+def test_move(project):
+    top  = getTop(project)
+    leaf = top.sub0.leaf2
+    project.dumpObject()
+    assert leaf.hierarchicalPath() == 'top.sub0.leaf2'
+    top.sub0.children.remove(leaf)
+    leaf.parent = top.sub2
+    top.sub2.addChild(leaf)
+    assert leaf.hierarchicalPath() == 'top.sub2.leaf2'
+    obj = top.dumpObject(project)
+    assert [x['id'] for x in obj['children'][0]['children']] == ['leaf0', 'leaf1']
+    assert obj['children'][2]['children'][-1]['path'] == 'top.sub2.leaf2'
+    project.verifyCache()
+
+def test_attributes(project):
+    top = getTop(project)
+    project.dumpObject()
+    top.sub2.setAttribute('BAR', 1)
+    assert top.dumpObject(project)['children'][2]['attributes'] == { 'BAR': 1 }
+    top.sub2.attributes['BAR'] = 2
+    assert top.dumpObject(project)['children'][2]['attributes'] == { 'BAR': 2 }
+    project.verifyCache()
+
+def test_tracking(dump):
+    project = DFProject().loadObject(dump)
+    top     = getTop(project)
+    # Nothing is tracked until a value derived from it is cached
+    assert not isTracked(top) and not isTracked(top.sub0.leaf0)
+    project.dumpObject()
+    assert isTracked(top) and isTracked(top.sub0.leaf0.ports.input.clk)
+    # Reporting a modification stops the node and its holders being tracked,
+    # but leaves its siblings (whose cached values are still valid) alone
+    top.sub0.leaf0.description = 'edited'
+    assert not isTracked(top.sub0.leaf0) and not isTracked(top.sub0)
+    assert not isTracked(top) and isTracked(top.sub1)
+    assert top.sub1.dumpObject(project) is top.sub1.dumpObject(project)
+    # Another design loaded afterwards is not tracked
+    other = DFProject().loadObject(dump)
+    assert not isTracked(getTop(other))
+    assert canonical(project.dumpObject()) != canonical(dump)
+
+def test_uncached_hash(project):
+    top    = getTop(project)
+    digest = top.contentHash()
+    assert top.contentHash(cached=False) == digest
+    # Rehashing must not reuse the cached hashes of any node below the block
+    sub = top.sub0
+    sub.registers[0]._DFRegisterGroup__hash = 'stale'
+    sub._DFBlock__hash = None
+    assert sub.contentHash() != sub.contentHash(cached=False)
+    assert top.contentHash(cached=False) == digest
+    command = project.findNode('cmd', DFCommand)
+    expected = command.contentHash()
+    command._DFCommand__hash = 'stale'
+    assert command.contentHash() == 'stale'
+    assert command.contentHash(cached=False) == expected
+
+def test_shortcut_rename():
+    parent = DFBlock('a', 'a_t')
+    child  = DFBlock('b', 'b_t', parent)
+    parent.children.append(child)
+    child.id = 'c'
+    assert parent.children.get_entry('c') is child
+    assert parent.children.get_entry('b') is None
+    assert parent.c is child
+
+def test_shortcut_miss():
+    parent = DFBlock('a', 'a_t')
+    child  = DFBlock('b', 'b_t', parent)
+    parent.children.append(child)
+    assert parent.children.get_entry('b') is child
+    # Renaming a node bypassing __setattr__ isn't reported, so is found by a scan
+    object.__setattr__(child, 'id', 'c')
+    assert parent.children.get_entry('c') is child
+    assert parent.c is child
+
+def test_slot_attributes():
+    port = DFPort('p', 'clock', 1, DFConstants.DIRECTION.INPUT)
+    port.custom = 'value'
+    assert port.custom == 'value'
+    assert not port.hasAttributes()
+    port.setAttribute('KEY', 1)
+    assert port.hasAttributes() and port.getAttribute('KEY') == 1
+
+def test_register_table(project):
+    top   = getTop(project)
+    table = top.registerTable()
+    assert top.registerTable() is table
+    # Modifying a register replaces the tables of the blocks holding it only
+    other = top.sub1.registerTable()
+    top.sub0.registers[0].registers[1].fields[0].lsb = 2
+    replaced = top.registerTable()
+    assert replaced is not table and top.sub1.registerTable() is other
+    fields = replaced.getObjects(FIELDS, replaced.select(FIELDS, lsb=2))
+    assert [x.id for x in fields] == ['f0']
+    assert project.registerTable().getCount(REGISTERS) == 9
+
+def test_address_map_validate(project):
+    top     = getTop(project)
+    mapping = top.address_map
+    with pytest.raises(Exception, match='A target has already been added for port top.sub0'):
+        mapping.addTarget(DFAddressMapTarget(top.sub0.ports.input.din, 0, 0, 0x10))
+    # Trusted loads skip the checks, leaving them to validate
+    mapping.addTarget(DFAddressMapTarget(top.sub0.ports.input.din, 0, 0, 0x10), check=False)
+    with pytest.raises(Exception, match='A target has already been added for port top.sub0'):
+        mapping.validate()
+    obj = json.loads(json.dumps(project.dumpObject()))
+    with pytest.raises(Exception, match='A target has already been added for port top.sub0'):
+        DFProject().loadObject(obj)
+    loaded = DFProject().loadObject(obj, trusted=True)
+    with pytest.raises(Exception, match='A target has already been added for port top.sub0'):
+        loaded.validate()
@@ -0,0 +1,158 @@
+# Copyright (C) 2019 Blu Wireless Ltd.
+# All Rights Reserved.
+#
+# This file is part of DesignFormat.
+#
+# DesignFormat is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# DesignFormat is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# DesignFormat. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Round-trip tests for each way of dumping and loading a project, every one of
+# which must reproduce exactly the output of DFProject.dumpObject.
+
+import io
+import json
+
+import pytest
+
+from designformat import *
+from designformat.register_table import FIELDS, GROUPS, REGISTERS
+
+from conftest import canonical
+
+def writeJSON(tmp_path, dump):
+    """ Write a dump to a JSON file, returning its path """
+    path = tmp_path / 'design.json'
+    path.write_text(json.dumps(dump))
+    return str(path)
+
+def getTop(project):
+    """ Return the top block of a project """
+    return project.getAllPrincipalNodes(desired=DFBlock)[0]
+
+@pytest.mark.parametrize('trusted', [False, True])
+def test_load_object(dump, trusted):
+    loaded = DFProject().loadObject(dump, trusted=trusted)
+    if trusted:
+        loaded.validate()
+    assert canonical(loaded.dumpObject()) == canonical(dump)
+
+@pytest.mark.parametrize('streaming', [False, True])
+@pytest.mark.parametrize('lazy', [False, True])
+def test_load_file(tmp_path, dump, streaming, lazy):
+    path   = writeJSON(tmp_path, dump)
+    loaded = DFProject().loadFile(path, streaming=streaming, lazy=lazy)
+    assert canonical(loaded.dumpObject()) == canonical(dump)
+
+def test_lazy_materialise(dump):
+    loaded = DFProject().loadObject(dump, lazy=True)
+    # Accessing a child constructs it, which must not change the dump
+    assert getTop(loaded).sub1.leaf2.ports.input.clk.count == 1
+    assert canonical(loaded.dumpObject()) == canonical(dump)
+
+def test_include(dump):
+    loaded = DFProject().loadObject(dump, include=['top.sub1*'])
+    top    = getTop(loaded)
+    assert [x.id for x in top.children] == ['sub1']
+    original = next(x for x in dump['nodes'] if x['__dump__'].get('id') == 'top')
+    expected = next(x for x in original['__dump__']['children'] if x['id'] == 'sub1')
+    assert canonical(top.sub1.dumpObject(loaded)) == canonical(expected)
+    # Connections and address map entries of the skipped blocks are dropped
+    assert all(x.end_port.block.id in ('top', 'sub1') for x in top.connections)
+    assert [x.port.block.id for x in top.address_map.targets] == ['sub1']
+
+def test_dump_to_file(project):
+    fh = io.StringIO()
+    project.dumpToFile(fh)
+    assert fh.getvalue() == json.dumps(project.dumpObject())
+
+def test_dump_stream(project):
+    fh = io.StringIO()
+    getTop(project).dumpStream(fh, project)
+    assert fh.getvalue() == json.dumps(getTop(project).dumpObject(project))
+
+def test_binary(tmp_path, project, dump):
+    data = project.dumpBinary()
+    assert canonical(DFProject().loadBinary(data).dumpObject()) == canonical(dump)
+    path = tmp_path / 'design.dfbin'
+    path.write_bytes(data)
+    assert canonical(DFProject().loadFile(str(path)).dumpObject()) == canonical(dump)
+
+def test_indexed(tmp_path, project, dump):
+    path = tmp_path / 'design.dfidx'
+    path.write_bytes(project.dumpIndexed())
+    assert canonical(DFProject().loadFile(str(path)).dumpObject()) == canonical(dump)
+
+def test_deduplicate(project, dump):
+    encoded = json.loads(json.dumps(project.dumpObject(deduplicate=True)))
+    assert len(json.dumps(encoded)) < len(json.dumps(dump))
+    assert canonical(DFProject().loadObject(encoded).dumpObject()) == canonical(dump)
+
+def test_shards(tmp_path, project, dump):
+    directory = str(tmp_path / 'shards')
+    project.dumpShards(directory)
+    assert canonical(DFProject().loadShards(directory).dumpObject()) == canonical(dump)
+    assert canonical(DFProject().loadFile(directory).dumpObject()) == canonical(dump)
+
+def test_parallel_dump(project, dump):
+    assert canonical(project.dumpObject(workers=2)) == canonical(dump)
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_snapshot_cache(tmp_path, dump, lazy):
+    path      = writeJSON(tmp_path, dump)
+    cache_dir = str(tmp_path / 'cache')
+    missed    = DFProject.load(path, cache_dir=cache_dir, lazy=lazy)
+    restored  = DFProject.load(path, cache_dir=cache_dir, lazy=lazy)
+    assert restored is not missed
+    assert canonical(restored.dumpObject()) == canonical(dump)
+    # The restored project can be modified like any other
+    getTop(restored).sub0.description = 'modified'
+    assert getTop(restored).dumpObject(restored)['children'][0]['description'] == 'modified'
+    restored.verifyCache()
+
+def test_snapshot_corrupt(tmp_path, dump):
+    path      = writeJSON(tmp_path, dump)
+    cache_dir = tmp_path / 'cache'
+    DFProject.load(path, cache_dir=str(cache_dir))
+    snapshot = next(cache_dir.glob('*.dfsnap'))
+    snapshot.write_bytes(snapshot.read_bytes()[:-100])
+    restored = DFProject.load(path, cache_dir=str(cache_dir))
+    assert canonical(restored.dumpObject()) == canonical(dump)
+
+def test_connection_table(project, dump):
+    getTop(project).compactConnections(recurse=True)
+    assert canonical(project.dumpObject()) == canonical(dump)
+    reloaded = DFProject().loadObject(json.loads(json.dumps(project.dumpObject())))
+    assert canonical(reloaded.dumpObject()) == canonical(dump)
+
+def test_connection_table_remove(project):
+    top = getTop(project)
+    top.compactConnections()
+    table   = top.connections
+    removed = [x for x in table if x.end_port.block.id == 'sub1']
+    for conn in removed:
+        table.remove(conn)
+    # Queries skip the removed rows before the table is compacted
+    assert top.sub1.ports.input.din.getInboundConnections() == []
+    assert len(table) == len(list(table))
+    assert all(x.end_port.block.id != 'sub1' for x in table)
+    project.verifyCache()
+
+def test_register_table(project):
+    table  = getTop(project).registerTable()
+    fields = table.getObjects(FIELDS, range(table.getCount(FIELDS)))
+    assert table.getCount(GROUPS) == 3 and table.getCount(REGISTERS) == 9
+    assert [x.lsb for x in fields] == [int(x) for x in table.fields['lsb']]
+    # Predicates are called with each value, whichever backend holds the table
+    rows = table.select(FIELDS, lsb=lambda x: x > 0 and x < 16)
+    assert table.getObjects(FIELDS, rows) == [x for x in fields if x.id == 'f1']
+    assert table.select(REGISTERS, bus_access='RW') == list(range(9))
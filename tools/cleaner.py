@@ -19,7 +19,6 @@
 #
 
 import argparse
-import json
 import os
 import sys
 
@@ -48,9 +47,12 @@ if __name__ == "__main__":
     args = get_args()
     # Load the blob
     print(f"Loading blob {args.input}")
-    df_root = None
-    with open(args.input, 'r') as fh:
-        df_root = DFProject().loadObject(json.load(fh))
+    # If only trees are being preserved, then only the blocks on those paths
+    # need to be loaded - the paths may or may not start with the root's ID
+    include = None
+    if len(args.preserve_tree) > 0 and len(args.preserve_connectivity) == 0:
+        include = args.preserve_tree + ["*." + x for x in args.preserve_tree]
+    df_root = DFProject().loadFile(args.input, streaming=True, include=include)
     if not df_root:
         print(f"Failed to open blob from path: {args.input}")
         sys.exit(1)
@@ -190,6 +192,5 @@ if __name__ == "__main__":
 
     # Now we supposedly have a clean design, save it out to file
     print("Dumping out the design")
-    json_dump = json.dumps(df_root.dumpObject())
     with open(args.output, 'w') as fh:
-        fh.write(json_dump)
+        df_root.dumpToFile(fh)
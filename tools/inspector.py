@@ -19,12 +19,12 @@
 #
 
 import argparse
-import json
 import os
 import sys
 
 # Import DesignFormat
 from designformat import DFProject, DFBlock, DFInterconnect
+from designformat.indexed import DFIndexedBlob, isIndexed
 
 ## get_args
 #  Handle command line arguments to the inspection tool
@@ -114,13 +114,26 @@ def main():
         print(f"ERROR: Could not read file at path: {args.blob}")
         sys.exit(255)
 
-    df_root = None
-    with open(args.blob, 'r') as fh:
-        df_root = DFProject().loadObject(json.load(fh))
+    # For indexed blobs, only decode the nodes that are actually needed - the
+    # principal nodes' attributes can be read straight from the index table
+    blob = None
+    with open(args.blob, 'rb') as fh:
+        if isIndexed(fh.read(16)) and not (args.top_interconnects or args.address_map):
+            blob = DFIndexedBlob(args.blob)
+
+    if blob:
+        df_root    = blob.loadProject(blob.findEntries(desired=DFInterconnect))
+        principals = [blob.loadSummary(x) for x in blob.findEntries(principal=True)]
+        block_ids  = [x['id'] for x in blob.findEntries(desired=DFBlock)]
+        blob.close()
+    else:
+        df_root    = DFProject().loadFile(args.blob, streaming=True, lazy=True)
+        principals = df_root.getAllPrincipalNodes()
+        block_ids  = [x.id for x in df_root.nodes.values() if isinstance(x, DFBlock)]
 
     # Identify the first principal node
     try:
-        principal = [x for x in df_root.getAllPrincipalNodes() if isinstance(x, DFBlock)][0]
+        principal = [x for x in principals if isinstance(x, DFBlock)][0]
     except:
         print("ERROR: Failed to locate a principal node")
         sys.exit(1)
@@ -158,8 +171,7 @@ def main():
 
     # Dump the list of root DFBlocks
     elif args.blocks:
-        blocks = [x for x in df_root.nodes.values() if isinstance(x, DFBlock)]
-        print((" " if args.spaced else "\n").join([x.id for x in blocks]))
+        print((" " if args.spaced else "\n").join(block_ids))
 
     # Dump an address map from a named entry-point
     elif args.address_map:
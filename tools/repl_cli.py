@@ -16,7 +16,6 @@
 # DesignFormat. If not, see <https://www.gnu.org/licenses/>.
 #
 
-import json
 import os
 import sys
 
@@ -30,9 +29,7 @@ if len(sys.argv) != 2 or sys.argv[1] == '-h':
     sys.exit(0)
 
 # Get hold of the root node
-df_root = None
-with open(sys.argv[1], 'r') as fh:
-    df_root = DFProject().loadObject(json.load(fh))
+df_root = DFProject().loadFile(sys.argv[1], streaming=True, lazy=True)
 print("Got df_root object with ID '" + df_root.id + "' of type " + type(df_root).__name__)
 print("Access the object properties using df_root.id etc.")
 
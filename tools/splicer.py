@@ -19,7 +19,6 @@
 #
 
 import argparse
-import json
 import os
 import sys
 
@@ -49,9 +48,7 @@ def get_args():
 def load_project(path):
     if not os.path.isfile(path):
         raise SpliceError(f"Could not read file at path: {path}")
-    df_root = None
-    with open(path, 'r') as fh:
-        df_root = DFProject().loadObject(json.load(fh))
+    df_root = DFProject().loadFile(path, streaming=True)
     return df_root
 
 def load_tops(path, f_type=DFBlock):
@@ -97,18 +94,18 @@ def main():
         if block.registers and len(block.registers) > 0:
             print(f"WARNING: Block {block.id} already has some registers - merging anyway")
         # Ensure we have storage for the registers
-        if not block.registers: block.registers = DFShortcutList()
+        if not block.registers: block.registers = DFShortcutList("id", block)
         # Append them
         for reg_grp in registers[key][0]:
             print(f"# - Appending register group {reg_grp.id} with offset {hex(registers[key][1])}")
+            reg_grp.block = block
             block.registers.append(reg_grp)
             reg_grp.offset += registers[key][1]
 
     # Write out the final database
     print("# Writing final database to file")
     with open(args.output, 'w') as fh:
-        json_dump = json.dumps(project.dumpObject())
-        fh.write(json_dump)
+        project.dumpToFile(fh)
 
 
 if __name__ == "__main__":